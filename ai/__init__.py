@@ -1,10 +1,15 @@
 """AI agent integration"""
 
-from .azure_openai_client import AzureOpenAIClient
+from .azure_openai_client import AzureOpenAIClient, get_default_client
+from .llm_cache import LLMCache, MemoryCache, SQLiteCache
 from .prompts import RECON_PROMPT, REPAIR_PROMPT, FLOOR_FIXER_PROMPT
 
 __all__ = [
     'AzureOpenAIClient',
+    'get_default_client',
+    'LLMCache',
+    'MemoryCache',
+    'SQLiteCache',
     'RECON_PROMPT',
     'REPAIR_PROMPT',
     'FLOOR_FIXER_PROMPT'
@@ -1,13 +1,91 @@
 """Azure OpenAI client for autonomous agents"""
 
 import os
+import re
 import json
+import time
+import uuid
+import random
+import atexit
+import asyncio
 import logging
-from typing import Dict, Any, Optional
-from openai import AzureOpenAI
+import itertools
+import threading
+from typing import Dict, Any, Optional, List, Tuple
+
+import httpx
+from openai import (
+    AzureOpenAI, AsyncAzureOpenAI,
+    RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
+)
+
+from utils.serialization import json_dumps, json_loads
+from .llm_cache import LLMCache, SQLiteCache, DEFAULT_TTL, CACHE_DIR
+from .prompts import RECON_PROMPT, REPAIR_PROMPT, EXTRACTION_CONFIG_PROMPT
+
+try:
+    import tiktoken
+except ImportError:  # Optional: token counts fall back to a chars/4 estimate
+    tiktoken = None
 
 logger = logging.getLogger(__name__)
 
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+# Transient failures worth retrying (429, timeouts, dropped connections, 5xx)
+_RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+# User prompt scaffolds (only the variable parts are filled in per call)
+_RECON_USER_TEMPLATE = """
+Analyze this website and recommend an extraction strategy:
+
+URL: {url}
+
+HTML Snippet (first {max_chars} chars):
+{html}
+
+Determine:
+1. Is data available via API? (check for fetch/ajax calls)
+2. Is it static HTML or JavaScript-rendered?
+3. Will we need Playwright or is requests sufficient?
+
+Respond in JSON format.
+"""
+
+_REPAIR_USER_TEMPLATE = """
+Data quality issue detected:
+
+ISSUE: {issue_description}
+
+SAMPLE RECORDS WITH ISSUE:
+{records_json}
+
+WEBSITE CONTEXT:
+{website_context}
+
+Your task: Investigate and propose a solution to fix this issue.
+
+Respond in JSON format with:
+- solution_type
+- implementation details
+- confidence score
+- whether Playwright is required
+"""
+
+_EXTRACTION_CONFIG_USER_TEMPLATE = """
+URL: {url}
+
+SITE ANALYSIS:
+{analysis_json}
+
+HTML FEATURES:
+{features_json}
+
+Return extraction config JSON (max 50 lines).
+"""
+
 
 class AzureOpenAIClient:
     """
@@ -25,7 +103,12 @@ class AzureOpenAIClient:
         endpoint: Optional[str] = None,
         api_key: Optional[str] = None,
         deployment_name: Optional[str] = None,
-        api_version: str = "2024-08-01-preview"
+        api_version: str = "2024-08-01-preview",
+        cache: Optional[LLMCache] = None,
+        context_window: int = 128000,
+        max_retries: int = 5,
+        breaker_threshold: int = 5,
+        breaker_cooldown: float = 60.0
     ):
         """
         Initialize Azure OpenAI client
@@ -35,11 +118,37 @@ class AzureOpenAIClient:
             api_key: Azure OpenAI API key
             deployment_name: Deployment name (e.g., "gpt-4")
             api_version: API version
+            cache: Optional response cache (low-temperature calls are served from it)
+            context_window: Model context size in tokens (prompt payloads are clipped to fit)
+            max_retries: Retries per call on rate limits / transient errors (exponential backoff + jitter)
+            breaker_threshold: Consecutive failed calls before further calls fail fast
+            breaker_cooldown: Seconds the circuit stays open before calls are tried again
         """
         self.endpoint = endpoint or os.getenv("AZURE_OPENAI_ENDPOINT")
         self.api_key = api_key or os.getenv("AZURE_OPENAI_API_KEY")
         self.deployment_name = deployment_name or os.getenv("AOAI_DEPLOYMENT_NAME")
+        # GPT-5.x models use max_completion_tokens instead of max_tokens
+        self._token_kw = "max_completion_tokens" if 'gpt-5' in (self.deployment_name or "").lower() else "max_tokens"
         self.api_call_count = 0  # Track number of API calls
+        self._call_ids = itertools.count(1)  # Atomic call numbering (safe across threads)
+        self.cache = cache
+        self.cache_hits = 0
+        self._httpx = None
+        self._api_version = api_version
+        # Async pool is bound to the event loop it was created on (see _get_async_client)
+        self._async_httpx = None
+        self._async_loop = None
+        self.async_client = None
+        self._batch_formats: Dict[str, Dict[str, Optional[str]]] = {}  # batch_id → custom_id → response_format
+        self._mock_batches: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.context_window = context_window
+        self._encoding = self._load_encoding()
+        self.max_retries = max_retries
+        self.retry_count = 0  # Retries are tracked separately from api_call_count
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._consecutive_failures = 0
+        self._breaker_open_until = 0.0
 
         if not all([self.endpoint, self.api_key, self.deployment_name]):
             logger.warning(
@@ -51,12 +160,58 @@ class AzureOpenAIClient:
             self.client = None
         else:
             self.mock_mode = False
+            # Shared keep-alive pool so sequential agent calls reuse TCP/TLS connections
+            self._httpx = httpx.Client(
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0),
+                timeout=httpx.Timeout(60.0)
+            )
             self.client = AzureOpenAI(
                 azure_endpoint=self.endpoint,
                 api_key=self.api_key,
-                api_version=api_version
+                api_version=api_version,
+                http_client=self._httpx,
+                max_retries=0  # Retries are handled by _with_retry
+            )
+            atexit.register(self.close)
+            logger.info("Azure OpenAI client initialized with deployment: %s", self.deployment_name)
+
+    def close(self):
+        """Close pooled HTTP connections"""
+        if self._httpx is not None:
+            self._httpx.close()
+            self._httpx = None
+
+    async def aclose(self):
+        """Close pooled HTTP connections of the async client"""
+        if self._async_httpx is not None:
+            await self._async_httpx.aclose()
+        self._async_httpx = None
+        self._async_loop = None
+        self.async_client = None
+
+    def _get_async_client(self) -> AsyncAzureOpenAI:
+        """
+        Async twin of self.client, for callers that fan out independent agent calls concurrently
+
+        Pooled connections belong to the event loop that opened them, so the
+        client is rebuilt when called from a different loop (e.g. each
+        asyncio.run in gather_agents) instead of reusing connections of a closed one.
+        """
+        loop = asyncio.get_running_loop()
+        if self.async_client is None or self._async_loop is not loop:
+            self._async_httpx = httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0),
+                timeout=httpx.Timeout(60.0)
+            )
+            self.async_client = AsyncAzureOpenAI(
+                azure_endpoint=self.endpoint,
+                api_key=self.api_key,
+                api_version=self._api_version,
+                http_client=self._async_httpx,
+                max_retries=0  # Retries are handled by _awith_retry
             )
-            logger.info(f"Azure OpenAI client initialized with deployment: {self.deployment_name}")
+            self._async_loop = loop
+        return self.async_client
 
     def create_agent(
         self,
@@ -64,7 +219,9 @@ class AzureOpenAIClient:
         user_prompt: str,
         response_format: Optional[str] = "json_object",
         temperature: float = 0.7,
-        max_tokens: int = 4096
+        max_tokens: int = 4096,
+        use_cache: Optional[bool] = None,
+        stream: Optional[bool] = None
     ) -> Dict[str, Any]:
         """
         Spawn an autonomous agent with a specific task
@@ -75,6 +232,9 @@ class AzureOpenAIClient:
             response_format: "json_object" or "text"
             temperature: Creativity (0.0-1.0)
             max_tokens: Max response length
+            use_cache: Force cache on/off (default: cache only low-temperature calls)
+            stream: Stream the completion and stop once the JSON object closes
+                    (default: on for json_object responses)
 
         Returns:
             Dict containing agent's response
@@ -83,55 +243,468 @@ class AzureOpenAIClient:
             logger.warning("Running in MOCK mode - returning simulated response")
             return self._mock_response(user_prompt)
 
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+        cache_key, cached = self._cache_lookup(messages, user_prompt, temperature, response_format, use_cache)
+        if cached is not None:
+            return cached
+
         try:
-            self.api_call_count += 1  # Increment call counter
+            call_id = self._next_call_id()
+
+            # Call Azure OpenAI
+            logger.info("API Call #%d to Azure OpenAI (%s)...", call_id, self.deployment_name)
 
+            if stream is None:
+                stream = response_format == "json_object"
+
+            def call() -> str:
+                response = self.client.chat.completions.create(
+                    **self._completion_kwargs(messages, response_format, temperature, max_tokens),
+                    stream=stream
+                )
+                if stream:
+                    return self._read_stream(response, response_format)
+                return response.choices[0].message.content
+
+            result = self._parse_content(self._with_retry(call), response_format)
+
+        except Exception as e:
+            logger.error("Azure OpenAI API error: %s", e)
+            return {"error": str(e)}
+
+        self._cache_store(cache_key, result, user_prompt)
+        return result
+
+    def create_agents_batch(
+        self,
+        system_prompt: str,
+        tasks: List[Any],
+        temperature: float = 0.7,
+        max_tokens: int = 8192,
+        use_cache: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run several independent tasks in a single chat completion
+
+        Packs the tasks into one JSON envelope so N small tasks consume one
+        request (one RPM slot) instead of N.
+
+        Args:
+            system_prompt: System instructions shared by all tasks
+            tasks: JSON-serializable task payloads (e.g. user prompts)
+            temperature: Creativity (0.0-1.0)
+            max_tokens: Max response length for the whole batch
+            use_cache: Force cache on/off (default: cache only low-temperature calls)
+
+        Returns:
+            One response dict per task, in task order
+        """
+        if not tasks:
+            return []
+
+        if self.mock_mode:
+            logger.warning("Running in MOCK mode - returning simulated responses")
+            return [self._mock_response(json_dumps(task)) for task in tasks]
+
+        user_prompt = (
+            f"Process these {len(tasks)} independent tasks and return a JSON object "
+            'of the form {"results": [...]} with exactly one result object per task, '
+            "in the same order as the tasks:\n"
+            + json_dumps(tasks, indent=True)
+        )
+
+        result = self.create_agent(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            response_format="json_object",
+            temperature=temperature,
+            max_tokens=max_tokens,
+            use_cache=use_cache
+        )
+
+        results = result.get('results')
+        if not isinstance(results, list) or len(results) != len(tasks):
+            error = result.get('error') or f"Batch response did not contain {len(tasks)} results"
+            logger.error("Batched agent call failed: %s", error)
+            return [{"error": error} for _ in tasks]
+
+        return [r if isinstance(r, dict) else {"response": r} for r in results]
+
+    def submit_batch(self, requests: List[Dict[str, Any]]) -> str:
+        """
+        Submit non-urgent agent calls to the Azure OpenAI Batch API
+
+        Batch jobs are billed at the discounted batch tier and complete
+        within 24h. Requires a Global-Batch deployment.
+
+        Args:
+            requests: create_agent keyword arguments plus a unique "custom_id"
+
+        Returns:
+            Batch ID to pass to fetch_batch
+        """
+        formats = {
+            request['custom_id']: request.get('response_format', "json_object")
+            for request in requests
+        }
+
+        if self.mock_mode:
+            logger.warning("Running in MOCK mode - batch resolves immediately with simulated responses")
+            batch_id = f"mock-batch-{uuid.uuid4().hex[:12]}"
+            self._mock_batches[batch_id] = {
+                request['custom_id']: self._mock_response(request.get('user_prompt', ''))
+                for request in requests
+            }
+            return batch_id
+
+        lines = []
+        for request in requests:
             messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
+                {"role": "system", "content": request['system_prompt']},
+                {"role": "user", "content": request['user_prompt']}
             ]
+            body = self._completion_kwargs(
+                messages,
+                request.get('response_format', "json_object"),
+                request.get('temperature', 0.7),
+                request.get('max_tokens', 4096)
+            )
+            lines.append(json_dumps({
+                "custom_id": request['custom_id'],
+                "method": "POST",
+                "url": "/chat/completions",
+                "body": body
+            }))
+
+        call_id = self._next_call_id()
+        logger.info("API Call #%d: submitting batch of %s requests...", call_id, len(requests))
+
+        batch_file = self.client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode('utf-8')),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/chat/completions",
+            completion_window="24h"
+        )
 
-            # Call Azure OpenAI
-            logger.info(f"API Call #{self.api_call_count} to Azure OpenAI ({self.deployment_name})...")
+        self._batch_formats[batch.id] = formats
+        logger.info("Submitted batch %s (status: %s)", batch.id, batch.status)
+        return batch.id
 
-            # GPT-5.x models use max_completion_tokens instead of max_tokens
-            token_param = {}
-            if 'gpt-5' in self.deployment_name.lower():
-                token_param = {"max_completion_tokens": max_tokens}
-            else:
-                token_param = {"max_tokens": max_tokens}
-
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=messages,
-                temperature=temperature,
-                **token_param,
-                response_format={"type": response_format} if response_format == "json_object" else None
-            )
+    def fetch_batch(self, batch_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Poll a submitted batch
+
+        Args:
+            batch_id: ID returned by submit_batch
+
+        Returns:
+            custom_id → response dict once the batch has finished, None while it is still running
+        """
+        if batch_id in self._mock_batches:
+            return self._mock_batches.pop(batch_id)
+
+        batch = self.client.batches.retrieve(batch_id)
+
+        if batch.status in ("validating", "in_progress", "finalizing", "cancelling"):
+            logger.info("Batch %s still running (status: %s)", batch_id, batch.status)
+            return None
+
+        formats = self._batch_formats.pop(batch_id, {})
+
+        if batch.status != "completed" or not batch.output_file_id:
+            logger.error("Batch %s ended with status: %s", batch_id, batch.status)
+            return {custom_id: {"error": f"Batch {batch.status}"} for custom_id in formats}
+
+        results = {}
+        output = self.client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            item = json_loads(line)
+            custom_id = item.get('custom_id')
+            response = item.get('response') or {}
+
+            if item.get('error') or response.get('status_code') != 200:
+                results[custom_id] = {"error": str(item.get('error') or response.get('body'))}
+                continue
+
+            content = response['body']['choices'][0]['message']['content']
+            results[custom_id] = self._parse_content(content, formats.get(custom_id, "json_object"))
 
-            content = response.choices[0].message.content
+        return results
 
-            # Parse JSON if requested
-            if response_format == "json_object":
-                try:
-                    return json.loads(content)
-                except json.JSONDecodeError:
-                    logger.error(f"Failed to parse JSON response: {content}")
-                    return {"error": "Invalid JSON response", "raw_content": content}
+    async def acreate_agent(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        response_format: Optional[str] = "json_object",
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        use_cache: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Async version of create_agent (same arguments and return value)
 
-            return {"response": content}
+        Lets callers run independent agents concurrently, e.g.:
+            await asyncio.gather(*[client.acreate_agent(...) for task in tasks])
+        """
+        if self.mock_mode:
+            logger.warning("Running in MOCK mode - returning simulated response")
+            return self._mock_response(user_prompt)
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+        cache_key, cached = self._cache_lookup(messages, user_prompt, temperature, response_format, use_cache)
+        if cached is not None:
+            return cached
+
+        try:
+            call_id = self._next_call_id()
+
+            logger.info("API Call #%d to Azure OpenAI (%s, async)...", call_id, self.deployment_name)
+
+            response = await self._awith_retry(
+                lambda: self._get_async_client().chat.completions.create(
+                    **self._completion_kwargs(messages, response_format, temperature, max_tokens)
+                )
+            )
+
+            result = self._parse_content(response.choices[0].message.content, response_format)
 
         except Exception as e:
-            logger.error(f"Azure OpenAI API error: {e}")
+            logger.error("Azure OpenAI API error: %s", e)
             return {"error": str(e)}
 
-    def analyze_website_structure(self, url: str, html_snippet: str) -> Dict[str, Any]:
+        self._cache_store(cache_key, result, user_prompt)
+        return result
+
+    async def agather_agents(self, tasks: List[Dict[str, Any]], max_concurrency: int = 10) -> List[Dict[str, Any]]:
+        """
+        Run several independent agents concurrently
+
+        Args:
+            tasks: List of acreate_agent keyword arguments
+            max_concurrency: Max in-flight requests (keeps under deployment RPM)
+
+        Returns:
+            Agent responses in the same order as tasks
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(task: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.acreate_agent(**task)
+
+        return await asyncio.gather(*(run(task) for task in tasks))
+
+    def gather_agents(self, tasks: List[Dict[str, Any]], max_concurrency: int = 10) -> List[Dict[str, Any]]:
+        """Blocking entry point for agather_agents"""
+        async def run_and_close() -> List[Dict[str, Any]]:
+            try:
+                return await self.agather_agents(tasks, max_concurrency)
+            finally:
+                await self.aclose()  # The pool cannot outlive this asyncio.run loop
+
+        return asyncio.run(run_and_close())
+
+    def _with_retry(self, call):
+        """Run an API call, retrying transient errors with exponential backoff + jitter"""
+        self._check_breaker()
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = call()
+            except _RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    self._record_failure()
+                    raise
+                delay = self._retry_delay(attempt, e)
+                time.sleep(delay)
+            else:
+                self._consecutive_failures = 0
+                return result
+
+    async def _awith_retry(self, call):
+        """Async version of _with_retry (call returns an awaitable)"""
+        self._check_breaker()
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = await call()
+            except _RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    self._record_failure()
+                    raise
+                delay = self._retry_delay(attempt, e)
+                await asyncio.sleep(delay)
+            else:
+                self._consecutive_failures = 0
+                return result
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """Backoff before the next attempt (honors Retry-After on 429s)"""
+        self.retry_count += 1
+
+        delay = None
+        response = getattr(error, 'response', None)
+        if response is not None:
+            try:
+                delay = min(60.0, float(response.headers.get('retry-after')))
+            except (TypeError, ValueError):
+                pass
+        if delay is None:
+            # Full jitter: uniform over [0, min(30s, 1s * 2^attempt)]
+            delay = random.uniform(0, min(30.0, 2.0 ** attempt))
+
+        logger.warning(
+            "Transient Azure OpenAI error (%s) - retry %d/%d in %.1fs",
+            type(error).__name__, attempt + 1, self.max_retries, delay
+        )
+        return delay
+
+    def _check_breaker(self):
+        """Fail fast while the circuit is open"""
+        if self._breaker_open_until > time.monotonic():
+            raise RuntimeError(
+                f"Azure OpenAI circuit open after {self._consecutive_failures} consecutive failures"
+            )
+
+    def _record_failure(self):
+        """Count a call that exhausted its retries, opening the circuit at the threshold"""
+        self._consecutive_failures += 1
+        if self._consecutive_failures >= self.breaker_threshold:
+            self._breaker_open_until = time.monotonic() + self.breaker_cooldown
+            logger.error(
+                "Azure OpenAI circuit opened for %.0fs after %d consecutive failures",
+                self.breaker_cooldown, self._consecutive_failures
+            )
+
+    def _next_call_id(self) -> int:
+        """Number the next API call"""
+        call_id = next(self._call_ids)
+        if call_id > self.api_call_count:  # Ids are unique, so the highest one is the call count
+            self.api_call_count = call_id
+        return call_id
+
+    def _cache_lookup(
+        self,
+        messages: List[Dict[str, str]],
+        user_prompt: str,
+        temperature: float,
+        response_format: Optional[str],
+        use_cache: Optional[bool]
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Return (cache_key, cached_response); key is None when caching is off"""
+        if self.cache is None:
+            return None, None
+        if not (use_cache if use_cache is not None else self.cache.accepts(temperature)):
+            return None, None
+
+        # Serve repeated deterministic prompts from cache
+        cache_key = self.cache.make_key(self.deployment_name, messages, temperature, response_format)
+        cached = self.cache.get(cache_key, user_prompt)
+        if cached is not None:
+            self.cache_hits += 1
+            logger.info("Cache hit for %s agent call (hits: %s)", self.deployment_name, self.cache_hits)
+        return cache_key, cached
+
+    def _cache_store(self, cache_key: Optional[str], result: Dict[str, Any], user_prompt: str):
+        """Store a successful response"""
+        if cache_key is not None and 'error' not in result:
+            self.cache.set(cache_key, result, user_prompt)
+
+    def _completion_kwargs(
+        self,
+        messages: List[Dict[str, str]],
+        response_format: Optional[str],
+        temperature: float,
+        max_tokens: int
+    ) -> Dict[str, Any]:
+        """Build chat.completions.create arguments"""
+        kwargs = {
+            "model": self.deployment_name,
+            "messages": messages,
+            "temperature": temperature,
+            self._token_kw: max_tokens
+        }
+        if response_format == "json_object":
+            kwargs["response_format"] = _JSON_RESPONSE_FORMAT
+        return kwargs
+
+    def _read_stream(self, response: Any, response_format: Optional[str]) -> str:
+        """
+        Accumulate streamed delta content
+
+        For JSON responses, stops reading as soon as the top-level object's
+        braces balance instead of waiting for the stream to finish.
+        """
+        parts = []
+        depth = 0
+        started = in_string = escaped = False
+
+        try:
+            for chunk in response:
+                if not chunk.choices:  # Azure sends a content-filter chunk with no choices
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+
+                if response_format != "json_object":
+                    continue
+
+                for char in delta:
+                    if in_string:
+                        if escaped:
+                            escaped = False
+                        elif char == '\\':
+                            escaped = True
+                        elif char == '"':
+                            in_string = False
+                    elif char == '"':
+                        in_string = True
+                    elif char in '{[':
+                        depth += 1
+                        started = True
+                    elif char in '}]':
+                        depth -= 1
+
+                if started and depth == 0:
+                    break
+        finally:
+            response.close()
+
+        return "".join(parts)
+
+    def _parse_content(self, content: str, response_format: Optional[str]) -> Dict[str, Any]:
+        """Parse JSON if requested"""
+        if response_format == "json_object":
+            try:
+                return json_loads(content)
+            except json.JSONDecodeError:
+                logger.error("Failed to parse JSON response: %s", content)
+                return {"error": "Invalid JSON response", "raw_content": content}
+
+        return {"response": content}
+
+    def analyze_website_structure(self, url: str, html_snippet: Any, *, max_chars: int = 2000) -> Dict[str, Any]:
         """
         Agent analyzes website structure and recommends extraction strategy
 
         Args:
             url: Target URL
-            html_snippet: Sample HTML from the page
+            html_snippet: Sample HTML from the page (str, bytes or a file-like object;
+                          only the first few KB are read)
+            max_chars: HTML characters to include in the prompt
 
         Returns:
             {
@@ -141,25 +714,38 @@ class AzureOpenAIClient:
                 "reasoning": "..."
             }
         """
-        from .prompts import RECON_PROMPT
+        return self.create_agent(**self._recon_request(url, html_snippet, max_chars))
 
-        user_prompt = f"""
-Analyze this website and recommend an extraction strategy:
-
-URL: {url}
-
-HTML Snippet (first 2000 chars):
-{html_snippet[:2000]}
+    async def aanalyze_website_structure(self, url: str, html_snippet: Any, *, max_chars: int = 2000) -> Dict[str, Any]:
+        """Async version of analyze_website_structure"""
+        return await self.acreate_agent(**self._recon_request(url, html_snippet, max_chars))
 
-Determine:
-1. Is data available via API? (check for fetch/ajax calls)
-2. Is it static HTML or JavaScript-rendered?
-3. Will we need Playwright or is requests sufficient?
+    def _html_window(self, html_snippet: Any, max_chars: int) -> str:
+        """
+        Take the first max_chars of HTML with whitespace runs collapsed
 
-Respond in JSON format.
-"""
+        Reads a bounded window (never the whole document) so multi-MB pages
+        are not copied; scripts are kept since they reveal API calls.
+        """
+        window = max_chars * 4  # Room for indentation collapsed below
+        if hasattr(html_snippet, 'read'):
+            html_snippet = html_snippet.read(window)
+        else:
+            html_snippet = html_snippet[:window]
+        if isinstance(html_snippet, bytes):
+            html_snippet = html_snippet.decode('utf-8', errors='replace')
+
+        return _WHITESPACE_RE.sub(' ', html_snippet).strip()[:max_chars]
+
+    def _recon_request(self, url: str, html_snippet: Any, max_chars: int = 2000) -> Dict[str, Any]:
+        """Build create_agent arguments for website analysis"""
+        user_prompt = _RECON_USER_TEMPLATE.format(
+            url=url,
+            max_chars=max_chars,
+            html=self._html_window(html_snippet, max_chars)
+        )
 
-        return self.create_agent(
+        return dict(
             system_prompt=RECON_PROMPT,
             user_prompt=user_prompt,
             response_format="json_object"
@@ -187,32 +773,35 @@ Respond in JSON format.
                 "requires_playwright": bool
             }
         """
-        from .prompts import REPAIR_PROMPT
+        return self.create_agent(**self._repair_request(issue_description, sample_records, website_context))
 
-        user_prompt = f"""
-Data quality issue detected:
-
-ISSUE: {issue_description}
-
-SAMPLE RECORDS WITH ISSUE:
-{json.dumps(sample_records[:5], indent=2, ensure_ascii=False)}
-
-WEBSITE CONTEXT:
-{website_context}
-
-Your task: Investigate and propose a solution to fix this issue.
+    async def afix_data_quality_issue(
+        self,
+        issue_description: str,
+        sample_records: list,
+        website_context: str
+    ) -> Dict[str, Any]:
+        """Async version of fix_data_quality_issue"""
+        return await self.acreate_agent(**self._repair_request(issue_description, sample_records, website_context))
+
+    def _repair_request(self, issue_description: str, sample_records: list, website_context: str) -> Dict[str, Any]:
+        """Build create_agent arguments for data quality repair"""
+        records_json = self._clip_to_budget(
+            json_dumps(sample_records[:5], indent=True),
+            self._payload_budget(REPAIR_PROMPT, 4096, issue_description, website_context)
+        )
 
-Respond in JSON format with:
-- solution_type
-- implementation details
-- confidence score
-- whether Playwright is required
-"""
+        user_prompt = _REPAIR_USER_TEMPLATE.format(
+            issue_description=issue_description,
+            records_json=records_json,
+            website_context=website_context
+        )
 
-        return self.create_agent(
+        return dict(
             system_prompt=REPAIR_PROMPT,
             user_prompt=user_prompt,
-            response_format="json_object"
+            response_format="json_object",
+            use_cache=True  # Same issue + samples + context recurs across repair iterations and runs
         )
 
     def generate_extraction_config(
@@ -238,21 +827,37 @@ Respond in JSON format with:
                 "confidence": 0.0-1.0
             }
         """
-        from .prompts import EXTRACTION_CONFIG_PROMPT
+        return self.create_agent(**self._extraction_config_request(url, html_features, site_analysis))
 
-        user_prompt = f"""
-URL: {url}
-
-SITE ANALYSIS:
-{json.dumps(site_analysis, indent=2, ensure_ascii=False)}
+    async def agenerate_extraction_config(
+        self,
+        url: str,
+        html_features: Dict[str, Any],
+        site_analysis: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of generate_extraction_config"""
+        return await self.acreate_agent(**self._extraction_config_request(url, html_features, site_analysis))
 
-HTML FEATURES:
-{json.dumps(html_features, indent=2, ensure_ascii=False)}
+    def _extraction_config_request(
+        self,
+        url: str,
+        html_features: Dict[str, Any],
+        site_analysis: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Build create_agent arguments for extraction config generation"""
+        analysis_json = json_dumps(site_analysis, indent=True)
+        features_json = self._clip_to_budget(
+            json_dumps(html_features, indent=True),
+            self._payload_budget(EXTRACTION_CONFIG_PROMPT, 1024, url, analysis_json)
+        )
 
-Return extraction config JSON (max 50 lines).
-"""
+        user_prompt = _EXTRACTION_CONFIG_USER_TEMPLATE.format(
+            url=url,
+            analysis_json=analysis_json,
+            features_json=features_json
+        )
 
-        return self.create_agent(
+        return dict(
             system_prompt=EXTRACTION_CONFIG_PROMPT,
             user_prompt=user_prompt,
             response_format="json_object",
@@ -260,11 +865,51 @@ Return extraction config JSON (max 50 lines).
             max_tokens=1024  # Config is small
         )
 
+    def _load_encoding(self):
+        """Tokenizer for prompt budgeting (None = estimate from characters)"""
+        if tiktoken is None:
+            return None
+        try:
+            return tiktoken.encoding_for_model(self.deployment_name or "")
+        except KeyError:  # Azure deployment names are usually custom
+            pass
+        try:
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning("tiktoken encoding unavailable, estimating token counts: %s", e)
+            return None
+
+    def _count_tokens(self, text: str) -> int:
+        """Count (or estimate) tokens in text"""
+        if self._encoding is None:
+            return len(text) // 4 + 1
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def _payload_budget(self, system_prompt: str, max_tokens: int, *fixed_parts: str) -> int:
+        """Tokens left for a variable prompt payload after everything else is accounted for"""
+        used = self._count_tokens(system_prompt) + sum(self._count_tokens(part) for part in fixed_parts)
+        return max(0, self.context_window - max_tokens - used - 500)  # 500: template + message overhead
+
+    def _clip_to_budget(self, text: str, budget: int) -> str:
+        """Truncate text to at most `budget` tokens"""
+        if self._encoding is None:
+            if len(text) <= budget * 4:
+                return text
+            clipped = text[:budget * 4]
+        else:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            if len(tokens) <= budget:
+                return text
+            clipped = self._encoding.decode(tokens[:budget])
+
+        logger.warning("Prompt payload clipped to %s tokens to fit the context window", budget)
+        return clipped + "\n... (truncated)"
+
     def _mock_response(self, prompt: str) -> Dict[str, Any]:
         """Simulated response when running in mock mode"""
-
-        # Detect what kind of request this is
-        if "analyze this website" in prompt.lower() or "extraction strategy" in prompt.lower():
+        # Detect what kind of request this is (lowercased once; fresh dicts, so callers may mutate them)
+        lowered = prompt.lower()
+        if "analyze this website" in lowered or "extraction strategy" in lowered:
             return {
                 "page_type": "api",
                 "recommended_strategy": "Use requests to call REST API endpoint",
@@ -273,7 +918,7 @@ Return extraction config JSON (max 50 lines).
                 "api_endpoint_pattern": "/get/{section}?mall_id={id}"
             }
 
-        elif "missing floor" in prompt.lower() or "floor data" in prompt.lower():
+        elif "missing floor" in lowered or "floor data" in lowered:
             return {
                 "solution_type": "api_field_mapping",
                 "reasoning": "Floor data likely in malllevel_id field, not location text",
@@ -294,3 +939,27 @@ Return extraction config JSON (max 50 lines).
                 "recommendation": "Add credentials to .env file",
                 "confidence": 0.5
             }
+
+
+_default_client: Optional[AzureOpenAIClient] = None
+_default_client_lock = threading.Lock()
+
+# On-disk response cache of the shared client (survives re-runs, entries expire after DEFAULT_TTL)
+_DEFAULT_CACHE_PATH = CACHE_DIR / "llm_cache.sqlite"
+
+
+def get_default_client() -> AzureOpenAIClient:
+    """
+    Process-wide shared client
+
+    Recon, repair and floor agents all reuse one SDK instance and
+    connection pool instead of each building their own.
+    """
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = AzureOpenAIClient(
+                    cache=LLMCache(backend=SQLiteCache(_DEFAULT_CACHE_PATH), ttl=DEFAULT_TTL)
+                )
+    return _default_client
@@ -1,89 +1,30 @@
 """AI-powered floor mapping discovery"""
 
-import json
+import re
+import time
+import uuid
+import hashlib
 import logging
-from typing import Dict, List, Any
+from pathlib import Path
+from concurrent.futures import Future
+from typing import Dict, List, Any, Optional, Tuple, Union
 from collections import defaultdict
 
-logger = logging.getLogger(__name__)
-
-
-class FloorMapper:
-    """
-    Uses AI agents to discover malllevel_id → floor mappings
-
-    Problem: malllevel_id is a database ID, not a floor number
-    Solution: Analyze shops that have floor info in location text,
-              discover the pattern, apply to all shops
-    """
-
-    def discover_mapping(
-        self,
-        raw_records: List[Any],
-        ai_client: Any
-    ) -> Dict[int, str]:
-        """
-        Discover malllevel_id → canonical floor mapping using AI
-
-        Uses multiple signals:
-        1. Floor info in location text (e.g., "1/F", "G/F")
-        2. Shop number patterns (e.g., "Shop 201" → Level 2)
-        3. Mall-specific context
-
-        Args:
-            raw_records: Raw shop records with malllevel_id and location
-            ai_client: AzureOpenAIClient instance
-
-        Returns:
-            Dict mapping malllevel_id → canonical floor ("G", "B1", "L1", etc.)
-        """
-        # Group records by malllevel_id
-        by_level = defaultdict(list)
-        for record in raw_records:
-            level_id = record.raw_data.get('malllevel_id')
-            location = record.raw_data.get('location', '')
-            shop_no = record.raw_data.get('display_unit', '')
+from utils.serialization import json_dumps, json_loads
+from .llm_cache import DEFAULT_TTL
 
-            if level_id is not None:
-                by_level[level_id].append({
-                    'location': location,
-                    'shop_no': shop_no,
-                    'name': record.raw_data.get('name_en') or record.raw_data.get('name'),
-                })
-
-        # Extract training samples with ANY useful floor signals
-        training_samples = []
-        for level_id, shops in by_level.items():
-            for shop in shops[:5]:  # Take up to 5 samples per level
-                location = shop['location']
-                shop_no = shop['shop_no']
-
-                # Collect samples with floor info in location
-                has_floor_in_location = any(
-                    pattern in location
-                    for pattern in ['G/F', '/F', '樓', '楼', 'Floor', 'Level', '地下', '地庫']
-                )
-
-                # Also collect samples with shop numbers (for pattern inference)
-                if has_floor_in_location or shop_no:
-                    training_samples.append({
-                        'malllevel_id': level_id,
-                        'location': location,
-                        'shop_no': shop_no,
-                        'shop': shop['name']
-                    })
+logger = logging.getLogger(__name__)
 
-        logger.info(f"Found {len(training_samples)} training samples (location + shop numbers)")
+# Location text that carries a floor signal
+_FLOOR_HINT_RE = re.compile(r"G/F|/F|樓|楼|Floor|Level|地下|地庫")
+_SHOP_NO_RE = re.compile(r"([A-Z])?(\d+)")
 
-        if not training_samples:
-            logger.warning("No training samples found - cannot discover mapping")
-            return {}
+# Shop number // 100 → canonical floor (numbers 1-99 are handled as Ground)
+_SHOP_NO_FLOORS = (None, 'L1', 'L2', 'L3', 'L4')
 
-        # Ask AI agent to discover the pattern
-        if ai_client and not ai_client.mock_mode:
-            logger.info("🤖 Asking AI agent to discover malllevel_id → floor mapping...")
+_SYSTEM_PROMPT = "You are a floor mapping discovery agent. Analyze building floor patterns and create accurate mappings."
 
-            prompt = f"""
+_MAPPING_PROMPT_TEMPLATE = """
 Analyze these shop records and discover the pattern between malllevel_id and floor number.
 
 IMPORTANT: Each mall may have different floor structures. Use ALL available clues:
@@ -92,7 +33,7 @@ IMPORTANT: Each mall may have different floor structures. Use ALL available clue
 3. Mall-specific patterns
 
 TRAINING DATA:
-{json.dumps(training_samples[:40], indent=2, ensure_ascii=False)}
+{samples_json}
 
 INFERENCE RULES:
 - Shop numbers 001-099 or G01-G99 → Ground floor (G)
@@ -128,30 +69,312 @@ Respond in JSON format:
 }}
 """
 
+
+class FloorMapper:
+    """
+    Uses AI agents to discover malllevel_id → floor mappings
+
+    Problem: malllevel_id is a database ID, not a floor number
+    Solution: Analyze shops that have floor info in location text,
+              discover the pattern, apply to all shops
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, mall_name: str = "mall", cache_ttl: Optional[float] = DEFAULT_TTL):
+        """
+        Initialize floor mapper
+
+        Args:
+            cache_dir: Directory for cached AI mappings (None = no caching)
+            mall_name: Mall name used in cache filenames
+            cache_ttl: Age in seconds after which a cached mapping is rediscovered (None = no expiry)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.mall_name = mall_name
+        self.cache_ttl = cache_ttl
+        # Where the last discover_mapping() result came from: "ai", "cache" (an earlier
+        # AI mapping), "heuristic", or None (no samples / batch mode)
+        self.last_source: Optional[str] = None
+
+        # (batch_id, custom_id, training samples, future) for batch-mode discoveries
+        self._pending_batches: List[Tuple[str, str, List[Dict], Future]] = []
+
+    def discover_mapping(
+        self,
+        raw_records: List[Any],
+        ai_client: Any,
+        mode: str = "online"
+    ) -> Union[Dict[int, str], "Future[Dict[int, str]]"]:
+        """
+        Discover malllevel_id → canonical floor mapping using AI
+
+        Uses multiple signals:
+        1. Floor info in location text (e.g., "1/F", "G/F")
+        2. Shop number patterns (e.g., "Shop 201" → Level 2)
+        3. Mall-specific context
+
+        Args:
+            raw_records: Raw shop records with malllevel_id and location
+            ai_client: AzureOpenAIClient instance
+            mode: "online" for an immediate call, "batch" to queue the call on
+                  the (cheaper, up to 24h) Batch API - resolve with poll_batches()
+
+        Returns:
+            Dict mapping malllevel_id → canonical floor ("G", "B1", "L1", etc.),
+            or a Future of that dict in batch mode (see last_source for its origin)
+        """
+        if mode not in ("online", "batch"):
+            raise ValueError(f"Unknown mapping mode: {mode}")
+        self.last_source = None
+
+        training_samples = self._training_samples(raw_records)
+
+        logger.info("Found %s training samples (location + shop numbers)", len(training_samples))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Training samples: %s", json_dumps(training_samples))
+
+        if mode == "batch":
+            return self._submit_batch(training_samples, ai_client)
+
+        if not training_samples:
+            logger.warning("No training samples found - cannot discover mapping")
+            return {}
+
+        cached = self._load_cached(training_samples)
+        if cached is not None:
+            self.last_source = "cache"
+            return cached
+
+        # Ask AI agent to discover the pattern
+        if ai_client and not ai_client.mock_mode:
+            logger.info("🤖 Asking AI agent to discover malllevel_id → floor mapping...")
+
             result = ai_client.create_agent(
-                system_prompt="You are a floor mapping discovery agent. Analyze building floor patterns and create accurate mappings.",
-                user_prompt=prompt,
+                system_prompt=_SYSTEM_PROMPT,
+                user_prompt=self._mapping_prompt(training_samples),
                 response_format="json_object"
             )
 
-            if 'mapping' in result:
-                # Convert string keys to int
-                mapping = {int(k): v for k, v in result['mapping'].items()}
-                logger.info(f"AI discovered {len(mapping)} floor mappings")
-                logger.info(f"Confidence: {result.get('confidence', 0):.1%}")
-                logger.info(f"Reasoning: {result.get('reasoning', 'N/A')}")
+            mapping = self._parse_mapping(result)
+            if mapping is not None:
+                self._store_cached(training_samples, mapping)
+                self.last_source = "ai"
                 return mapping
 
         # Fallback: Simple heuristic mapping
         logger.info("Using heuristic floor mapping (no AI available)")
+        self.last_source = "heuristic"
         return self._heuristic_mapping(training_samples)
 
+    def discover_mappings(
+        self,
+        records_by_mall: Dict[str, List[Any]],
+        ai_client: Any
+    ) -> Dict[str, Dict[int, str]]:
+        """
+        Discover floor mappings for several malls with one batched AI call
+
+        Args:
+            records_by_mall: Mall name → raw shop records
+            ai_client: AzureOpenAIClient instance
+
+        Returns:
+            Mall name → (malllevel_id → canonical floor) mapping
+        """
+        samples_by_mall = {
+            mall: self._training_samples(records)
+            for mall, records in records_by_mall.items()
+        }
+        pending = [mall for mall, samples in samples_by_mall.items() if samples]
+
+        mappings = {}
+
+        if pending and ai_client and not ai_client.mock_mode:
+            logger.info("🤖 Asking AI agent to discover floor mappings for %s malls in one batch...", len(pending))
+            results = ai_client.create_agents_batch(
+                system_prompt=_SYSTEM_PROMPT,
+                tasks=[self._mapping_prompt(samples_by_mall[mall]) for mall in pending]
+            )
+            for mall, result in zip(pending, results):
+                mapping = self._parse_mapping(result)
+                if mapping is not None:
+                    mappings[mall] = mapping
+
+        # Fallback: heuristic mapping for malls the AI could not map
+        for mall in pending:
+            if mall not in mappings:
+                logger.info("Using heuristic floor mapping for %s", mall)
+                mappings[mall] = self._heuristic_mapping(samples_by_mall[mall])
+
+        return {mall: mappings.get(mall, {}) for mall in records_by_mall}
+
+    def poll_batches(self, ai_client: Any) -> int:
+        """
+        Resolve batch-mode discoveries whose batch job has finished
+
+        Args:
+            ai_client: AzureOpenAIClient instance that submitted the batches
+
+        Returns:
+            Number of discoveries still pending
+        """
+        results_by_batch = {}
+        still_pending = []
+
+        for batch_id, custom_id, samples, future in self._pending_batches:
+            if batch_id not in results_by_batch:
+                try:
+                    results_by_batch[batch_id] = ai_client.fetch_batch(batch_id)
+                except Exception as e:
+                    logger.error("Failed to poll batch %s: %s", batch_id, e)
+                    results_by_batch[batch_id] = {}
+
+            results = results_by_batch[batch_id]
+            if results is None:
+                still_pending.append((batch_id, custom_id, samples, future))
+                continue
+
+            mapping = self._parse_mapping(results.get(custom_id, {}))
+            if mapping is not None:
+                self._store_cached(samples, mapping)
+            else:
+                logger.info("Using heuristic floor mapping (batch returned no mapping)")
+                mapping = self._heuristic_mapping(samples)
+            future.set_result(mapping)
+
+        self._pending_batches = still_pending
+        return len(still_pending)
+
+    def _submit_batch(self, training_samples: List[Dict], ai_client: Any) -> "Future[Dict[int, str]]":
+        """Queue a mapping discovery on the Batch API"""
+        future: "Future[Dict[int, str]]" = Future()
+
+        if not training_samples:
+            logger.warning("No training samples found - cannot discover mapping")
+            future.set_result({})
+            return future
+
+        cached = self._load_cached(training_samples)
+        if cached is not None:
+            future.set_result(cached)
+            return future
+
+        if not ai_client or ai_client.mock_mode:
+            logger.info("Using heuristic floor mapping (no AI available)")
+            future.set_result(self._heuristic_mapping(training_samples))
+            return future
+
+        custom_id = f"floor-mapping-{uuid.uuid4().hex[:12]}"
+        logger.info("🤖 Queueing floor mapping discovery on the Batch API...")
+        batch_id = ai_client.submit_batch([{
+            "custom_id": custom_id,
+            "system_prompt": _SYSTEM_PROMPT,
+            "user_prompt": self._mapping_prompt(training_samples),
+            "response_format": "json_object"
+        }])
+
+        self._pending_batches.append((batch_id, custom_id, training_samples, future))
+        return future
+
+    def _cache_path(self, training_samples: List[Dict]) -> Optional[Path]:
+        """Cache file for this sample set (the samples the prompt is built from)"""
+        if self.cache_dir is None:
+            return None
+
+        samples = sorted(
+            training_samples[:40],
+            key=lambda s: (str(s['malllevel_id']), s['location'] or '')
+        )
+        key = hashlib.sha256(
+            json_dumps(samples, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        return self.cache_dir / f"{self.mall_name}_{key}.json"
+
+    def _load_cached(self, training_samples: List[Dict]) -> Optional[Dict[int, str]]:
+        """Load a previously discovered mapping for the same samples"""
+        path = self._cache_path(training_samples)
+        if path is None:
+            return None
+
+        try:
+            if self.cache_ttl is not None and time.time() - path.stat().st_mtime > self.cache_ttl:
+                logger.info("Cached floor mapping %s is older than %ss, rediscovering", path, self.cache_ttl)
+                return None
+            mapping = {int(k): v for k, v in json_loads(path.read_bytes()).items()}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable floor mapping cache %s: %s", path, e)
+            return None
+
+        logger.info("Loaded cached floor mapping (%s levels) from %s", len(mapping), path)
+        return mapping
+
+    def _store_cached(self, training_samples: List[Dict], mapping: Dict[int, str]):
+        """Persist an AI-discovered mapping"""
+        path = self._cache_path(training_samples)
+        if path is None or not mapping:  # An empty mapping is a failed discovery, not an answer
+            return
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json_dumps(mapping, indent=True), encoding='utf-8')
+        except OSError as e:
+            logger.warning("Could not write floor mapping cache %s: %s", path, e)
+
+    def _training_samples(self, raw_records: List[Any]) -> List[Dict]:
+        """Collect up to 5 samples per malllevel_id that carry floor signals"""
+        # Single pass: only the first 5 shops of each level are considered,
+        # samples stay grouped by level in the order levels first appear
+        by_level = defaultdict(list)
+        seen = defaultdict(int)
+        for record in raw_records:
+            raw = record.raw_data
+            level_id = raw.get('malllevel_id')
+            if level_id is None:
+                continue
+            samples = by_level[level_id]  # Register the level on first sight, even if no shop qualifies yet
+            if seen[level_id] >= 5:  # Take up to 5 samples per level
+                continue
+            seen[level_id] += 1
+
+            location = raw.get('location', '')
+            shop_no = raw.get('display_unit', '')
+
+            # Collect samples with floor info in location, and samples
+            # with shop numbers (for pattern inference)
+            if shop_no or _FLOOR_HINT_RE.search(location):
+                samples.append({
+                    'malllevel_id': level_id,
+                    'location': location,
+                    'shop_no': shop_no,
+                    'shop': raw.get('name_en') or raw.get('name')
+                })
+
+        return [sample for samples in by_level.values() for sample in samples]
+
+    def _mapping_prompt(self, training_samples: List[Dict]) -> str:
+        """Build the floor mapping discovery prompt"""
+        return _MAPPING_PROMPT_TEMPLATE.format(
+            samples_json=json_dumps(training_samples[:40], indent=True)
+        )
+
+    def _parse_mapping(self, result: Dict[str, Any]) -> Optional[Dict[int, str]]:
+        """Extract malllevel_id → floor mapping from an agent response"""
+        if 'mapping' not in result:
+            return None
+
+        # Convert string keys to int
+        mapping = {int(k): v for k, v in result['mapping'].items()}
+        logger.info("AI discovered %s floor mappings", len(mapping))
+        logger.info("Confidence: %.1f%%", result.get('confidence', 0) * 100)
+        logger.info("Reasoning: %s", result.get('reasoning', 'N/A'))
+        return mapping
+
     def _heuristic_mapping(self, samples: List[Dict]) -> Dict[int, str]:
         """
         Fallback heuristic mapping when AI not available
         Uses shop number patterns and location text
         """
-        import re
         from collections import Counter
 
         # Group samples by malllevel_id
@@ -183,29 +406,24 @@ Respond in JSON format:
                 # Priority 2: Infer from shop number patterns
                 if shop_no and not floor_votes:
                     # Extract leading digits
-                    match = re.match(r'([A-Z])?(\d+)', shop_no.upper())
+                    match = _SHOP_NO_RE.match(shop_no.upper())
                     if match:
                         prefix = match.group(1)
                         number = int(match.group(2))
 
-                        if prefix == 'G' or (number < 100 and number > 0):
+                        if prefix == 'G' or 0 < number < 100:
                             floor_votes.append('G')
                         elif prefix == 'B':
                             floor_votes.append('B1')
-                        elif 100 <= number < 200:
-                            floor_votes.append('L1')
-                        elif 200 <= number < 300:
-                            floor_votes.append('L2')
-                        elif 300 <= number < 400:
-                            floor_votes.append('L3')
-                        elif 400 <= number < 500:
-                            floor_votes.append('L4')
+                        elif number < 500 and _SHOP_NO_FLOORS[number // 100]:
+                            floor_votes.append(_SHOP_NO_FLOORS[number // 100])
 
             # Take majority vote
             if floor_votes:
-                counter = Counter(floor_votes)
-                most_common = counter.most_common(1)[0][0]
+                # Votes are 1-5 items: count on the list (ties → first vote, as Counter)
+                most_common = max(floor_votes, key=floor_votes.count)
                 mapping[level_id] = most_common
-                logger.info(f"  malllevel_id {level_id} → {most_common} (votes: {dict(counter)})")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("  malllevel_id %s → %s (votes: %s)", level_id, most_common, dict(Counter(floor_votes)))
 
         return mapping
@@ -0,0 +1,210 @@
+"""Response cache for Azure OpenAI agent calls"""
+
+import os
+import math
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple, Callable, Sequence, Protocol
+
+from utils.serialization import json_dumps, json_loads
+
+logger = logging.getLogger(__name__)
+
+# Default lifetime of persisted agent responses and mappings (seconds)
+DEFAULT_TTL = 24 * 60 * 60
+
+# Base directory of the on-disk caches, independent of the working directory
+# (override with MALLSCRAPER_CACHE_DIR)
+CACHE_DIR = Path(os.getenv("MALLSCRAPER_CACHE_DIR") or Path.home() / ".mallscraper_cache")
+
+
+class CacheBackend(Protocol):
+    """Storage interface used by LLMCache (values are serialized JSON strings)"""
+
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ...
+
+
+class MemoryCache:
+    """In-process LRU cache backend"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class SQLiteCache:
+    """On-disk cache backend (survives re-runs)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < time.time():
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LLMCache:
+    """
+    Two-tier cache for agent responses
+
+    Tier 1: exact match on sha256(model|messages|temperature|response_format)
+    Tier 2 (optional): semantic match - cosine similarity between embeddings
+            of the user prompt, enabled by passing an `embedder` callable
+            (e.g. a sentence-transformers model's `encode`)
+
+    Only low-temperature calls are cached by default, since those are the
+    ones expected to return the same answer for the same prompt.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        max_temperature: float = 0.05,
+        ttl: Optional[float] = None,
+        embedder: Optional[Callable[[str], Sequence[float]]] = None,
+        similarity_threshold: float = 0.92
+    ):
+        """
+        Initialize cache
+
+        Args:
+            backend: Storage backend (default: in-memory LRU)
+            max_temperature: Calls above this temperature are not cached automatically
+            ttl: Entry lifetime in seconds (None = no expiry)
+            embedder: Optional callable mapping text → embedding vector
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+        """
+        self.backend = backend if backend is not None else MemoryCache()
+        self.max_temperature = max_temperature
+        self.ttl = ttl
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self._vectors: List[Tuple[List[float], str]] = []  # (normalized embedding, key)
+        self._lock = threading.Lock()
+
+    def accepts(self, temperature: float) -> bool:
+        """Check if a call with this temperature should be cached automatically"""
+        return temperature <= self.max_temperature
+
+    @staticmethod
+    def make_key(
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        response_format: Optional[str]
+    ) -> str:
+        """Build exact-match cache key"""
+        payload = json_dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "rf": response_format},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str, prompt: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Look up a response by exact key, falling back to semantic match"""
+        value = self.backend.get(key)
+
+        if value is None and self.embedder is not None and prompt:
+            similar_key = self._find_similar(prompt)
+            if similar_key is not None:
+                value = self.backend.get(similar_key)
+
+        return json_loads(value) if value is not None else None
+
+    def set(self, key: str, value: Dict[str, Any], prompt: Optional[str] = None):
+        """Store a response"""
+        self.backend.set(key, json_dumps(value), ttl=self.ttl)
+
+        if self.embedder is not None and prompt:
+            vector = self._embed(prompt)
+            if vector:
+                with self._lock:
+                    self._vectors.append((vector, key))
+
+    def _embed(self, text: str) -> List[float]:
+        """Embed and L2-normalize text so similarity is a dot product"""
+        try:
+            vector = [float(x) for x in self.embedder(text)]
+        except Exception as e:
+            logger.warning("Embedding failed, skipping semantic cache: %s", e)
+            return []
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector] if norm else []
+
+    def _find_similar(self, prompt: str) -> Optional[str]:
+        """Return key of the most similar cached prompt above threshold"""
+        vector = self._embed(prompt)
+        if not vector:
+            return None
+
+        best_key, best_score = None, self.similarity_threshold
+        with self._lock:
+            for cached_vector, key in self._vectors:
+                score = sum(a * b for a, b in zip(vector, cached_vector))
+                if score >= best_score:
+                    best_key, best_score = key, score
+
+        if best_key is not None:
+            logger.debug("Semantic cache hit (similarity %.3f)", best_score)
+        return best_key
@@ -2,12 +2,27 @@
 
 import logging
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, Tag
+from lxml import etree, html as lxml_html
+import soupsieve as sv
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter, defaultdict
+from functools import lru_cache
+from html import escape
+from itertools import islice
+from operator import attrgetter
 import json
 import re
+import time
+import asyncio
+import hashlib
+import traceback
+from urllib.parse import urlparse, urljoin, unquote
 
 from .models import (
     RawRecord,
@@ -16,12 +31,286 @@ from .models import (
     EvaluationReport,
     PageClassification
 )
-from ai.azure_openai_client import AzureOpenAIClient
+from ai.azure_openai_client import get_default_client
+from ai.llm_cache import CACHE_DIR, DEFAULT_TTL
 from utils.normalization import normalize_floor, extract_shop_number, extract_floor_and_shop_from_location
 from utils.export import export_to_csv, export_to_json, create_summary_report
+from utils.serialization import json_dumps, json_loads
 
 logger = logging.getLogger(__name__)
 
+# API endpoints in fetch/ajax calls - one alternation, each branch captures the URL
+_API_CALL_RE = re.compile('|'.join([
+    r'fetch\([\'"]([^\'\"]+)[\'"]',  # fetch('url')
+    r'\.get\([\'"]([^\'\"]+)[\'"]',  # $.get('url') or axios.get('url')
+    r'\.post\([\'"]([^\'\"]+)[\'"]',  # $.post('url') or axios.post('url')
+    r'ajax\(\s*\{[^}]*url:\s*[\'"]([^\'\"]+)[\'"]',  # $.ajax({url: 'url'})
+    r'apiUrl\s*=\s*[\'"]([^\'\"]+)[\'"]',  # apiUrl = 'url'
+    r'endpoint\s*=\s*[\'"]([^\'\"]+)[\'"]',  # endpoint = 'url'
+]))
+_API_KEYWORD_RE = re.compile(r'shop|store|tenant|mall|dining|api|/get/|/data/')
+_JSON_HINT_RE = re.compile(r'JSON\.parse|__INITIAL|window\.|var shops|const stores')
+# String literals (skipped whole, so brackets inside strings don't count) or brackets
+_JSON_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]]')
+# Assignments of shop-like arrays in scripts; the array itself is bracket-matched
+_JSON_ARRAY_KEY_PATTERNS = [
+    re.compile(r'\bshops?\s*[:=]\s*(?=\[)', re.I),
+    re.compile(r'\bstores?\s*[:=]\s*(?=\[)', re.I),
+    re.compile(r'\bitems?\s*[:=]\s*(?=\[)', re.I),
+    re.compile(r'\bdata\s*[:=]\s*(?=\[)', re.I),
+]
+_TEXT_BLOCK_TAGS = frozenset({'div', 'span', 'p'})  # Strategy 4 name candidates in card parsing
+_TEXT_TAGS = frozenset({'h1', 'h2', 'h3', 'h4', 'h5', 'a', 'span', 'div'})  # Shop-name candidates
+_PAGINATION_RE = re.compile(r'next|prev|page|下一頁|上一頁|load more|更多', re.I)
+_JS_VAR_RE = re.compile(r'(?:window\.|var |const |let )(\w+)\s*=')
+# Script bodies straight from the HTML (raw-text elements, so no entity decoding is needed)
+_SCRIPT_RE = re.compile(r'<script\b[^>]*>([\s\S]*?)</script\s*>', re.I)
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Shop card / detail page parsing (keyword sets as one alternation - a single scan per string)
+_UI_CLASS_RE = re.compile(r'button|btn|dropdown|icon|menu|nav', re.I)
+_RENDERED_UI_CLASS_RE = re.compile(r'button|btn|dropdown|icon|menu|nav|filter|header|footer', re.I)
+_WEEKDAY_RE = re.compile(r'星期[一二三四五六日]|公眾假期')  # Opening-hours text
+_HAS_LETTER_RE = re.compile(r'[A-Za-z\u4e00-\u9fff]')
+_LOCATION_SPLIT_RE = re.compile(r'[,，]')
+_NAME_TAIL_RE = re.compile(r'\s*(一期|二期|三期|LB|UB|L\d+|G/F|B\d+|舖).*$')  # Floor/unit info after a name
+_PHASE_SUFFIX_RE = re.compile(r'\s*(一期|二期|三期|四期|Phase\s*[0-9]+)\s*$', re.I)
+# Labeled fields on detail pages, in priority order (searched one by one: each
+# pattern starts with a literal, which re scans for far faster than a merged regex)
+_DETAIL_SHOP_CODE_PATTERNS = (
+    re.compile(r'Shop\s*(?:No|Number|Code)?[:\s]+([A-Z0-9\-]+)', re.I),
+    re.compile(r'Unit\s*(?:No|Number|Code)?[:\s]+([A-Z0-9\-]+)', re.I),
+    re.compile(r'店鋪編號[:\s]+([A-Z0-9\-]+)', re.I),
+    re.compile(r'舖位編號[:\s]+([A-Z0-9\-]+)', re.I),
+)
+_DETAIL_FLOOR_PATTERNS = (
+    re.compile(r'Floor[:\s]+([A-Z0-9\-]+)', re.I),
+    re.compile(r'樓層[:\s]+([A-Z0-9\-]+)', re.I),
+)
+
+# Normalization
+# Chinese & English category keywords in URL paths - one lookahead branch per
+# category in priority order; the matched branch's group name is the category
+_CATEGORY_RE = re.compile(
+    r"^(?:"
+    r"(?=[\s\S]*?(?:shopping|shop|時尚|購物|fashion|retail|boutique))(?P<Shopping>)"
+    r"|(?=[\s\S]*?(?:dining|food|restaurant|餐飲|美食|cafe|coffee))(?P<Dining>)"
+    r"|(?=[\s\S]*?(?:entertainment|娛樂|消閒|leisure|recreation))(?P<Entertainment>)"
+    r"|(?=[\s\S]*?(?:lifestyle|生活|品味|wellness|beauty|健康))(?P<Lifestyle>)"
+    r"|(?=[\s\S]*?(?:service|服務|medical|clinic|bank|atm))(?P<Services>)"
+    r")",
+    re.I
+)
+_SHOP_CODE_SPLIT_RE = re.compile(r'^([A-Z]+[0-9]*)[:\-\s]+([0-9A-Z]+)$', re.I)  # "LB-06" → LB, 06
+# Floor prefix of a shop number - anchored branches, tried most specific to least specific
+_SHOP_NO_FLOOR_RE = re.compile(
+    r'^(?:(LB|UB|LG|UG|UC|LC)(?:[0-9])'  # LB06 → LB, UB04 → UB
+    r'|(L[0-9]+|B[0-9]+|P[0-9]+|M[0-9]*)'  # L3-456 → L3, B1-02 → B1
+    r'|(G|C)(?:[^A-Z]|$))',  # G123 → G, C-05 → C (but not GA, CA)
+    re.I
+)
+# Valid canonical formats: G, B1-B9, L1-L99, LB, UB, LG, UG, C, UC, LC, M, P1-P9
+_VALID_FLOOR_RE = re.compile(r'^(G|B[0-9]+|L[0-9]+|LB|UB|LG|UG|C|UC|LC|M[0-9]*|P[0-9]+)$')
+
+
+def _json_block_at(text: str, start: int, max_len: int) -> int:
+    """
+    End offset of the balanced {...} / [...] block opening at text[start]
+
+    Returns -1 if the block does not close within max_len characters.
+    Single forward scan - no regex backtracking over large script bodies.
+    """
+    opener = text[start]
+    closer = '}' if opener == '{' else ']'
+    depth = 0
+    for match in _JSON_TOKEN_RE.finditer(text, start, start + max_len):
+        token = match.group()
+        if token == opener:
+            depth += 1
+        elif token == closer:
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    return -1
+
+
+def _find_json_block(text: str, opener: str, min_len: int = 50, max_len: int = 2000) -> Optional[str]:
+    """First balanced block starting with opener whose body is min_len-max_len characters"""
+    pos = text.find(opener)
+    while pos != -1:
+        end = _json_block_at(text, pos, max_len + 2)
+        if end != -1 and end - pos >= min_len + 2:
+            return text[pos:end]
+        # Too short: skip past it; unclosed in window: try the next (nested) opener
+        pos = text.find(opener, end if end != -1 else pos + 1)
+    return None
+
+
+def _data_path_keys(data_path: str) -> Tuple[str, ...]:
+    """Split a dotted data path ("data.shops") once; "" or "." means the root"""
+    if not data_path or data_path == '.':
+        return ()
+    return tuple(key for key in data_path.split('.') if key)
+
+
+def _walk_data_path(data, keys: Tuple[str, ...]):
+    """Follow data path keys into nested dicts; None as soon as a key is missing"""
+    for key in keys:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+        if data is None:
+            return None
+    return data
+
+
+def _class_tags(root) -> List:
+    """
+    All class-bearing tags under root, in document order
+
+    Same result as root.find_all(class_=True), but uses bs4's fast path for
+    find_all(True) and a plain attrs check instead of per-tag attribute matching.
+    """
+    return [tag for tag in root.find_all(True) if 'class' in tag.attrs]
+
+
+def _link_ancestor_ids(root) -> set:
+    """
+    ids of the tags under root that contain an <a>
+
+    One upward walk per link (stopping at the first ancestor already marked)
+    replaces a find('a') subtree search per candidate tag.
+    """
+    ids = set()
+    for link in root.find_all('a'):
+        for parent in link.parents:
+            if id(parent) in ids:
+                break  # Its ancestors are already marked
+            ids.add(id(parent))
+    return ids
+
+
+def _html_snippet(tag: Tag, limit: int) -> str:
+    """
+    First `limit` characters of str(tag), serializing only as much of the subtree as needed
+
+    Children are serialized in order and recursion stops once the limit is
+    reached, so large cards are not rendered in full just to be truncated.
+    """
+    if tag.can_be_empty_element:  # Void element - no children to render
+        return str(tag)[:limit]
+
+    close = f'</{tag.name}>'
+    opening = str(Tag(name=tag.name, attrs=tag.attrs))[:-len(close)]
+    parts, size = [opening], len(opening)
+    for child in tag.children:
+        if size >= limit:
+            break
+        piece = _html_snippet(child, limit - size) if isinstance(child, Tag) else child.output_ready()
+        parts.append(piece)
+        size += len(piece)
+    else:
+        parts.append(close)
+    return ''.join(parts)[:limit]
+
+
+def _tags_with_any_class(class_tags: List, classes: List[str]) -> List:
+    """Filter _class_tags() output like find_all(class_=classes), without another tree walk"""
+    wanted = set(classes)
+    return [tag for tag in class_tags if not wanted.isdisjoint(tag.attrs['class'])]
+
+
+def _lxml_link_holders(tree) -> set:
+    """lxml counterpart of _link_ancestor_ids: the elements under tree that contain an <a>"""
+    holders = set()
+    for link in tree.iter('a'):
+        for parent in link.iterancestors():
+            if parent in holders:
+                break  # Its ancestors are already marked
+            holders.add(parent)
+    return holders
+
+
+def _lxml_text(element, strip: bool = False) -> str:
+    """lxml counterpart of bs4's get_text() / get_text(strip=True)"""
+    strings = _LXML_STRINGS(element)
+    if strip:
+        return ''.join(string.strip() for string in strings)
+    return ''.join(strings)
+
+
+def _lxml_snippet(element, limit: int) -> str:
+    """
+    lxml counterpart of _html_snippet: first `limit` characters of
+    tostring(element, with_tail=False), serializing only as much of the subtree as needed
+
+    Small subtrees (also voids, comments and empty elements) are written in
+    one tostring() call; larger ones are split into start tag, text and
+    children, and recursion stops once the limit is reached.
+    """
+    if next(islice(element.iter(), _LXML_SNIPPET_WHOLE_NODES, None), None) is None:
+        return lxml_html.tostring(element, encoding='unicode', with_tail=False)[:limit]
+
+    # Start tag as lxml writes it, from a one-character stand-in for the content
+    close = f'</{element.tag}>'
+    shell = element.makeelement(element.tag, element.attrib)
+    shell.text = '.'
+    shell = lxml_html.tostring(shell, encoding='unicode')
+    if not shell.endswith('.' + close):  # Void element - no end tag to split on
+        return lxml_html.tostring(element, encoding='unicode', with_tail=False)[:limit]
+
+    raw_text = element.tag in _LXML_RAW_TEXT_TAGS
+    opening = shell[:-len(close) - 1]
+    parts, size = [opening], len(opening)
+    if element.text:
+        piece = element.text if raw_text else escape(element.text, quote=False)
+        parts.append(piece)
+        size += len(piece)
+    for child in element:
+        if size >= limit:
+            break
+        piece = _lxml_snippet(child, limit - size)
+        if child.tail:
+            piece += child.tail if raw_text else escape(child.tail, quote=False)
+        parts.append(piece)
+        size += len(piece)
+    else:
+        parts.append(close)
+    return ''.join(parts)[:limit]
+
+
+# Subtrees up to this many nodes are cheaper to serialize whole than piecewise
+_LXML_SNIPPET_WHOLE_NODES = 32
+# Elements whose text lxml's HTML serializer writes unescaped
+_LXML_RAW_TEXT_TAGS = frozenset(('script', 'style'))
+
+# Compiled XPath queries for rendered pages (parsed with lxml.html directly, without bs4)
+_LXML_CLASS_TAGS = etree.XPath('//*[@class]')
+# Text nodes bs4's get_text() keeps - script/style/template contents are left out
+_LXML_STRINGS = etree.XPath('.//text()[not(ancestor::script or ancestor::style or ancestor::template)]')
+_LXML_HEADINGS = etree.XPath('.//h1|.//h2|.//h3|.//h4|.//h5|.//h6')
+_LXML_LINKS = etree.XPath('.//a[@href]')
+_LXML_NAME_CLASS = etree.XPath(
+    "descendant::*[contains(translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'name')"
+    " or contains(translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'title')"
+    " or contains(translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'shop')"
+    " or contains(translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'store')"
+    " or contains(translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'brand')][1]"
+)
+
+# Strategy 3 of card parsing: elements whose class mentions a name-like keyword (any case)
+_NAME_CLASS_SELECTOR = sv.compile(
+    '[class*=name i], [class*=title i], [class*=shop i], [class*=store i], [class*=brand i]'
+)
+
+# Browser pages rendering shop detail pages at once
+_DETAIL_PAGE_WORKERS = 8
+
+# Concurrent API probes in flight (candidate URLs are mostly on one host)
+_PROBE_WORKERS = 16
+_MALL_IDS = range(1, 20)
+_SPARSE_MALL_IDS = (1, 5, 10, 15, 19)  # Probed first; the full range only after a hit
+
 
 class AutonomousMallScraper:
     """
@@ -54,22 +343,42 @@ class AutonomousMallScraper:
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
         # Extract mall name from URL for file naming
-        from urllib.parse import urlparse
         domain = urlparse(root_url).netloc
         # Remove www. and .com.hk/.com/.hk etc.
         self.mall_name = domain.replace('www.', '').split('.')[0]
 
-        # Initialize AI client
-        self.ai_client = AzureOpenAIClient() if use_ai_agents else None
+        # Initialize AI client (shared process-wide; count only this run's calls)
+        self.ai_client = get_default_client() if use_ai_agents else None
+        self._api_calls_start = self.ai_client.api_call_count if self.ai_client else 0
 
         # State
         self.config = SiteConfig()
         self.raw_records: List[RawRecord] = []
+        self._record_keys: set = set()  # Dedup keys of raw_records (see _record_key)
+        self._duplicates_skipped = 0
         self.normalized_records: List[NormalizedRecord] = []
         self.session = requests.Session()
+        self._soup_cache: Dict[str, Tuple[str, BeautifulSoup]] = {}  # URL → (html, parsed tree)
+        self._feature_cache: Dict[bytes, Dict] = {}  # blake2b(html) → extracted HTML features
+        self._root_html: Optional[str] = None  # Root page, fetched once and shared by recon and extraction
+        # Floor mapping discovered by a previous run (applied once the extracted levels match)
+        self._floor_mapping_file = self.output_dir / f"{self.mall_name}_floor_mapping.json"
+        self._stored_floor_mapping = self._load_floor_mapping()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        # Large keep-alive pool for concurrent API probes, with backoff on 429/5xx only -
+        # connect/read timeouts fail at once, so a dead candidate URL costs one timeout
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=3, connect=0, read=0, backoff_factor=0.3,
+                status_forcelist=[429, 502, 503, 504]
+            )
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
     def run(
         self,
@@ -154,7 +463,7 @@ class AutonomousMallScraper:
         self._save_results(evaluation, iteration)
 
         # Get API call count
-        api_calls = self.ai_client.api_call_count if self.ai_client else 0
+        api_calls = self.ai_client.api_call_count - self._api_calls_start if self.ai_client else 0
 
         return {
             "success": evaluation.passes_threshold(coverage_threshold),
@@ -173,11 +482,15 @@ class AutonomousMallScraper:
         if self.ai_client and not self.ai_client.mock_mode:
             logger.info("🤖 Using AI agent to discover site structure...")
             try:
-                resp = self.session.get(self.root_url, timeout=15)
-                analysis = self.ai_client.analyze_website_structure(
-                    self.root_url,
-                    resp.text
-                )
+                html = self._fetch_root_html()
+                # Precompute extraction features while the AI analysis is in flight
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    features = executor.submit(self._html_features, html)
+                    analysis = self.ai_client.analyze_website_structure(self.root_url, html)
+                    # Not fatal: extraction recomputes the features if the cache was not filled
+                    feature_error = features.exception()
+                    if feature_error is not None:
+                        logger.warning(f"HTML feature precompute failed: {feature_error}")
                 logger.info(f"✅ AI Analysis complete:")
                 logger.info(f"   Page type: {analysis.get('page_type', 'unknown')}")
                 logger.info(f"   Strategy: {analysis.get('recommended_strategy', 'N/A')[:80]}")
@@ -206,39 +519,59 @@ class AutonomousMallScraper:
     def _extract_data(self):
         """Step 2: Extract raw data using site-specific or AI-generated code"""
         self.raw_records = []
+        self._record_keys = set()
+        self._duplicates_skipped = 0
 
         # Check if we have generated extraction config from previous run
-        if hasattr(self.config, 'extraction_config') and self.config.extraction_config:
+        if self.config.extraction_config:
             logger.info("📝 Using previously generated extraction config...")
-            # Fetch HTML again
-            resp = self.session.get(self.root_url, timeout=15)
-            self._execute_config_based_extraction(self.config.extraction_config, resp.text)
-            self._deduplicate_records()
+            self._execute_config_based_extraction(self.config.extraction_config, self._fetch_root_html())
+            self._report_duplicates()
             return
 
         # Use AI to generate extraction code for any site
         if self.ai_client and not self.ai_client.mock_mode:
             logger.info("\n🤖 AI generating extraction code for unknown site...")
             self._generate_and_execute_extraction()
-            self._deduplicate_records()
+            self._report_duplicates()
         else:
             logger.warning("⚠️  Unknown site and no AI agent available")
             logger.warning("   Cannot extract data automatically")
 
-    def _extract_html_features(self, html: str) -> Dict:
-        """Extract structured features from HTML - optimized for shop detection"""
-        from bs4 import BeautifulSoup
-        import re
+    def _fetch_root_html(self, refresh: bool = False) -> str:
+        """Root page HTML, fetched on first use (or again when refresh is set)"""
+        if self._root_html is None or refresh:
+            self._root_html = self.session.get(self.root_url, timeout=15).text
+        return self._root_html
+
+    def _html_features(self, html: str) -> Dict:
+        """HTML features of the root page, memoized by content hash"""
+        feature_key = hashlib.blake2b(html.encode('utf-8'), digest_size=16).digest()
+        features = self._feature_cache.get(feature_key)
+        if features is None:
+            features = self._extract_html_features(self._get_soup(self.root_url, html))
+            self._feature_cache[feature_key] = features
+        return features
+
+    def _get_soup(self, url: str, html: str) -> BeautifulSoup:
+        """Parse a fetched page once and reuse the tree until the page is fetched again"""
+        cached = self._soup_cache.get(url)
+        if cached is not None and (cached[0] is html or cached[0] == html):  # Refetch of an unchanged page
+            return cached[1]
 
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = BeautifulSoup(html, 'lxml')
+        self._soup_cache[url] = (html, soup)
+        return soup
 
+    def _extract_html_features(self, soup: BeautifulSoup) -> Dict:
+        """Extract structured features from a parsed page - optimized for shop detection"""
         features = {
             # Repeated elements (likely shop cards)
             "repeated_structures": [],
             "sample_html_nodes": [],
 
             # Semantic tags
-            "has_article_tags": len(soup.find_all('article')) > 0,
+            "has_article_tags": False,
             "has_data_attributes": False,
 
             # Script tags (for embedded JSON)
@@ -255,120 +588,119 @@ class AutonomousMallScraper:
             "likely_shop_info": []
         }
 
-        # Find repeated structures (shop cards)
-        class_counter = {}
-        id_pattern_counter = {}
+        # One walk over the tree gathers everything the passes below need
+        class_counter = Counter()  # Repeated structures (shop cards)
+        class_tags, scripts, text_tags = [], [], []
 
-        for tag in soup.find_all(class_=True):
-            classes = ' '.join(sorted(tag.get('class', [])))
-            if classes:
-                class_counter[classes] = class_counter.get(classes, 0) + 1
+        for node in soup.descendants:
+            if not isinstance(node, Tag):
+                # Check for pagination (stop looking once found)
+                if not features["pagination_present"] and _PAGINATION_RE.search(node):
+                    features["pagination_present"] = True
+                continue
 
-            # Check for data attributes
-            if any(attr.startswith('data-') for attr in tag.attrs):
-                features["has_data_attributes"] = True
+            name = node.name
+            if name == 'script':
+                scripts.append(node)
+            elif name in _TEXT_TAGS:
+                text_tags.append(node)
+            elif name == 'article':
+                features["has_article_tags"] = True
+
+            attrs = node.attrs
+            if 'class' in attrs:
+                class_tags.append(node)
+                classes = ' '.join(sorted(attrs['class']))
+                if classes:
+                    class_counter[classes] += 1
+
+                # Check for data attributes (stop looking once one is found)
+                if not features["has_data_attributes"] and any(attr.startswith('data-') for attr in attrs):
+                    features["has_data_attributes"] = True
 
         # Get top repeated classes (minimum 5 occurrences = likely a list)
-        repeated = [(cls, count) for cls, count in class_counter.items() if count >= 5]
-        repeated.sort(key=lambda x: x[1], reverse=True)
-        features["repeated_structures"] = repeated[:5]
+        repeated = [(cls, count) for cls, count in class_counter.most_common(5) if count >= 5]
+        features["repeated_structures"] = repeated
 
         # If we found repeated structures, extract sample HTML
         if repeated:
-            top_class = repeated[0][0]
-            sample_nodes = soup.find_all(class_=top_class.split())[:2]
+            sample_nodes = _tags_with_any_class(class_tags, repeated[0][0].split())[:2]
             for node in sample_nodes:
                 # Minify: remove extra whitespace
-                node_html = str(node)[:500]  # First 500 chars
+                node_html = _html_snippet(node, 500)  # First 500 chars
                 features["sample_html_nodes"].append(node_html)
 
         # Check for embedded JSON and API patterns in scripts
         api_patterns_found = []
-        for script in soup.find_all('script'):
+        for script in scripts:
             text = script.string or ''
 
-            # Look for API endpoints in fetch/ajax calls
-            api_patterns = [
-                r'fetch\([\'"]([^\'\"]+)[\'"]',  # fetch('url')
-                r'\.get\([\'"]([^\'\"]+)[\'"]',  # $.get('url') or axios.get('url')
-                r'\.post\([\'"]([^\'\"]+)[\'"]',  # $.post('url') or axios.post('url')
-                r'ajax\(\s*\{[^}]*url:\s*[\'"]([^\'\"]+)[\'"]',  # $.ajax({url: 'url'})
-                r'apiUrl\s*=\s*[\'"]([^\'\"]+)[\'"]',  # apiUrl = 'url'
-                r'endpoint\s*=\s*[\'"]([^\'\"]+)[\'"]',  # endpoint = 'url'
-            ]
-            for pattern in api_patterns:
-                matches = re.findall(pattern, text)
-                for match in matches:
-                    if any(keyword in match.lower() for keyword in ['shop', 'store', 'tenant', 'mall', 'dining', 'api', '/get/', '/data/']):
-                        api_patterns_found.append(match)
+            # Look for API endpoints in fetch/ajax calls (one scan for all call styles)
+            for match in _API_CALL_RE.finditer(text):
+                url = match.group(match.lastindex)
+                if _API_KEYWORD_RE.search(url.lower()):
+                    api_patterns_found.append(url)
 
             # Look for JSON assignments
-            if any(pattern in text for pattern in ['JSON.parse', '__INITIAL', 'window.', 'var shops', 'const stores']):
+            if _JSON_HINT_RE.search(text):
                 features["has_json_script"] = True
 
-                # Try to extract actual JSON
-                json_patterns = [
-                    r'(\{[\s\S]{50,2000}?\})',  # JSON objects
-                    r'(\[[\s\S]{50,2000}?\])',  # JSON arrays
-                ]
-                for pattern in json_patterns:
-                    matches = re.findall(pattern, text)
-                    if matches:
-                        features["json_sample"] = matches[0][:1000]
+                # Try to extract actual JSON (objects, then arrays)
+                for opener in '{[':
+                    block = _find_json_block(text, opener)
+                    if block:
+                        features["json_sample"] = block[:1000]
                         break
 
                 # Extract variable names
-                var_patterns = re.findall(r'(?:window\.|var |const |let )(\w+)\s*=', text[:1000])
+                var_patterns = _JS_VAR_RE.findall(text[:1000])
                 features["script_patterns"].extend(var_patterns[:5])
 
         # Add discovered API patterns to features
         if api_patterns_found:
             features["api_patterns_in_js"] = list(set(api_patterns_found))[:10]  # Dedupe and limit
 
-        # Find likely shop names (text that repeats in pattern)
-        text_elements = {}
-        for tag in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'a', 'span', 'div']):
+        # Find likely shop names (text that repeats in pattern) - the first
+        # (parent class, tag) group to reach 3 texts wins; stop once it has 5
+        text_elements = defaultdict(list)
+        shop_group = None
+        for tag in text_tags:
+            # Parent class is an attribute lookup; check it before the subtree text walk
+            parent_class = ' '.join(tag.parent.get('class', []))
+            if not parent_class:
+                continue
+            key = (parent_class, tag.name)
+            if shop_group is not None and key != shop_group:
+                continue
             text = tag.get_text(strip=True)
             if 5 < len(text) < 80:  # Reasonable shop name length
-                parent_class = ' '.join(tag.parent.get('class', []))
-                if parent_class:
-                    key = (parent_class, tag.name)
-                    if key not in text_elements:
-                        text_elements[key] = []
-                    text_elements[key].append(text)
-
-        # Find patterns with multiple instances
-        for (parent_class, tag_name), texts in text_elements.items():
-            if len(texts) >= 3:  # At least 3 shops
-                features["likely_shop_names"].extend(texts[:5])
-                break
+                texts = text_elements[key]
+                texts.append(text)
+                if shop_group is None and len(texts) >= 3:  # At least 3 shops
+                    shop_group = key
+                if len(texts) >= 5:
+                    break
 
-        # Check for pagination
-        pagination_keywords = ['next', 'prev', 'page', '下一頁', '上一頁', 'load more', '更多']
-        for keyword in pagination_keywords:
-            if soup.find(string=re.compile(keyword, re.I)):
-                features["pagination_present"] = True
-                break
+        if shop_group is not None:
+            features["likely_shop_names"].extend(text_elements[shop_group])
 
         return features
 
     def _generate_and_execute_extraction(self):
         """Use AI to generate extraction CONFIG and execute with engine"""
-        import time
 
         max_retries = 2
         retry_delay = 5  # seconds
 
         for attempt in range(max_retries):
             try:
-                # Fetch sample HTML
+                # Sample HTML: the page fetched during recon, refetched on retries
                 logger.info(f"Fetching {self.root_url} for analysis...")
-                resp = self.session.get(self.root_url, timeout=15)
-                html = resp.text
+                html = self._fetch_root_html(refresh=attempt > 0)
 
-                # Extract features (NOT raw HTML!)
+                # Extract features (NOT raw HTML!) - retries on an unchanged page reuse them
                 logger.info("Extracting HTML features...")
-                html_features = self._extract_html_features(html)
+                html_features = self._html_features(html)
                 logger.info(f"   Found {len(html_features.get('links', []))} links")
                 logger.info(f"   Found {len(html_features.get('top_classes', []))} repeated classes")
                 logger.info(f"   JSON in scripts: {html_features.get('has_json_script', False)}")
@@ -376,7 +708,7 @@ class AutonomousMallScraper:
                     logger.info(f"   API patterns found in JS: {html_features['api_patterns_in_js']}")
 
                 # Get site analysis (from discovery step)
-                site_analysis = getattr(self.config, 'ai_analysis', {})
+                site_analysis = self.config.ai_analysis
 
                 # Generate extraction CONFIG (not code!)
                 if attempt > 0:
@@ -436,12 +768,11 @@ class AutonomousMallScraper:
                     time.sleep(retry_delay)
                     retry_delay *= 2
                 else:
-                    import traceback
                     traceback.print_exc()
                     logger.error("❌ Code generation failed after all retries")
 
     def _execute_config_based_extraction(self, config: Dict, html: str):
-        """Execute extraction with automatic fallback if primary method fails"""
+        """Execute extraction with automatic fallback if primary method fails (page parsed only if needed)"""
         try:
             # DEFAULT: Use Playwright for all malls (slower but more accurate)
             # Playwright can click into shop detail pages to extract accurate floor codes
@@ -456,7 +787,7 @@ class AutonomousMallScraper:
             if extraction_type == 'api':
                 self._extract_via_api(config)
             elif extraction_type == 'html':
-                self._extract_via_html(config, html)
+                self._extract_via_html(config, self._get_soup(self.root_url, html))
             elif extraction_type == 'json_embedded':
                 self._extract_via_embedded_json(config, html)
             else:
@@ -474,7 +805,7 @@ class AutonomousMallScraper:
                 if len(self.raw_records) == 0:
                     # Try generic HTML extraction
                     logger.info("Fallback 2: Trying generic HTML extraction...")
-                    self._extract_via_html_auto(html)
+                    self._extract_via_html_auto(self._get_soup(self.root_url, html))
 
                 if len(self.raw_records) == 0:
                     # Last resort: Playwright to render JavaScript
@@ -483,7 +814,6 @@ class AutonomousMallScraper:
 
         except Exception as e:
             logger.error(f"Error executing config-based extraction: {e}")
-            import traceback
             traceback.print_exc()
 
     def _extract_via_api(self, config: Dict):
@@ -501,34 +831,35 @@ class AutonomousMallScraper:
         else:
             full_url = api_endpoint
 
-        # Try different variations (mall_id, id, etc.)
-        for mall_id in range(1, 20):
-            url = full_url.replace('{mall_id}', str(mall_id)).replace('{id}', str(mall_id))
+        scraped_at = datetime.now().isoformat()  # One timestamp for the whole sweep
+
+        # Try different variations (mall_id, id, etc.) - sparse probe first, densified on a hit
+        path_keys = _data_path_keys(config.get('data_path', '.'))
 
+        def has_records(body) -> bool:
+            data = _walk_data_path(body, path_keys)
+            return isinstance(data, list) and len(data) > 0
+
+        _, probed = self._sweep_mall_ids(method, [full_url], has_records)
+        for mall_id, url, body in probed:
             try:
-                resp = self.session.request(method, url, timeout=10)
-                if resp.status_code == 200:
-                    data = resp.json()
-
-                    # Navigate to data path
-                    data_path = config.get('data_path', '.')
-                    if data_path != '.':
-                        for key in data_path.split('.'):
-                            data = data.get(key, data)
-
-                    # Convert to RawRecord
-                    if isinstance(data, list):
-                        for item in data:
-                            record = RawRecord(
-                                source_url=url,
-                                source_section="api",
-                                scraped_at=datetime.now().isoformat(),
-                                raw_data=item,
-                                extraction_method="ai_config_api"
-                            )
-                            self.raw_records.append(record)
-                        logger.info(f"  API {mall_id}: {len(data)} records")
-            except:
+                # Navigate to data path
+                data = _walk_data_path(body, path_keys)
+
+                # Convert to RawRecord
+                if isinstance(data, list):
+                    self._add_records([
+                        RawRecord(
+                            source_url=url,
+                            source_section="api",
+                            scraped_at=scraped_at,
+                            raw_data=item,
+                            extraction_method="ai_config_api"
+                        )
+                        for item in data
+                    ])
+                    logger.info(f"  API {mall_id}: {len(data)} records")
+            except Exception:
                 pass
 
         # If initial endpoint failed, try common variations
@@ -536,7 +867,6 @@ class AutonomousMallScraper:
             logger.info(f"⚠️  Initial API endpoint got 0 records, trying common variations...")
 
             # Parse base URL
-            from urllib.parse import urlparse
             parsed = urlparse(self.root_url)
             base_url = f"{parsed.scheme}://{parsed.netloc}"
 
@@ -549,113 +879,219 @@ class AutonomousMallScraper:
                 '/api/tenants?mall_id={mall_id}',
                 '/data/shops?mall_id={mall_id}',
             ]
+            logger.info(f"   Trying {len(common_patterns)} patterns")
 
-            for pattern in common_patterns:
-                logger.info(f"   Trying pattern: {pattern}")
-                for mall_id in range(1, 20):
-                    url = base_url + pattern.replace('{mall_id}', str(mall_id))
+            # First pattern (in order) with data wins
+            pattern, probed = self._sweep_mall_ids(
+                method,
+                [base_url + pattern for pattern in common_patterns],
+                lambda body: bool(self._probe_items(body))
+            )
 
-                    try:
-                        resp = self.session.request(method, url, timeout=10)
-                        if resp.status_code == 200:
-                            data = resp.json()
-
-                            # Try to find list in common locations
-                            if isinstance(data, list):
-                                items = data
-                            elif isinstance(data, dict):
-                                # Try common data paths
-                                items = (data.get('data') or data.get('shops') or
-                                        data.get('stores') or data.get('items') or
-                                        data.get('tenants') or [])
-                            else:
-                                items = []
-
-                            if isinstance(items, list) and len(items) > 0:
-                                for item in items:
-                                    record = RawRecord(
-                                        source_url=url,
-                                        source_section="api",
-                                        scraped_at=datetime.now().isoformat(),
-                                        raw_data=item,
-                                        extraction_method="ai_config_api_variation"
-                                    )
-                                    self.raw_records.append(record)
-                                logger.info(f"  ✅ Found data with pattern {pattern} (mall_id={mall_id}): {len(items)} records")
-                    except:
-                        pass
+            for mall_id, url, body in probed:
+                # Try to find list in common locations
+                items = self._probe_items(body)
 
-                # If we found data with this pattern, stop trying others
-                if len(self.raw_records) > 0:
-                    logger.info(f"✅ Successfully found data using variation: {pattern}")
-                    break
+                if items:
+                    self._add_records([
+                        RawRecord(
+                            source_url=url,
+                            source_section="api",
+                            scraped_at=scraped_at,
+                            raw_data=item,
+                            extraction_method="ai_config_api_variation"
+                        )
+                        for item in items
+                    ])
+                    logger.info(f"  ✅ Found data with pattern {pattern} (mall_id={mall_id}): {len(items)} records")
+
+            if len(self.raw_records) > 0:
+                logger.info(f"✅ Successfully found data using variation: {pattern}")
 
         logger.info(f"✅ Extracted {len(self.raw_records)} records via API")
 
-    def _extract_via_html(self, config: Dict, html: str):
-        """Extract data via HTML selectors"""
-        from bs4 import BeautifulSoup
+    def _sweep_mall_ids(
+        self,
+        method: str,
+        url_templates: List[str],
+        has_data: Callable[[object], bool]
+    ) -> Tuple[Optional[str], List[Tuple[int, str, object]]]:
+        """
+        Probe mall_id variations of URL templates, sparse first
+
+        Every template is probed at _SPARSE_MALL_IDS only; the first template
+        (in order) with data there is densified to the full _MALL_IDS range.
+        A dead pattern costs 5 requests instead of 19.
+
+        Args:
+            method: HTTP method
+            url_templates: URLs with optional {mall_id} / {id} placeholders
+            has_data: Predicate on a decoded response body
+
+        Returns:
+            (winning template, [(mall_id, url, decoded body), ...]) - (None, []) if none had data
+        """
+        def expand(template: str, mall_ids) -> Dict[str, int]:
+            urls = {}
+            for mall_id in mall_ids:
+                url = template.replace('{mall_id}', str(mall_id)).replace('{id}', str(mall_id))
+                urls.setdefault(url, mall_id)
+            return urls
+
+        sparse = {template: expand(template, _SPARSE_MALL_IDS) for template in url_templates}
+
+        def earlier_template_hit(completed, results) -> bool:
+            """Stop once every probe up to the first template with data has answered"""
+            for urls in sparse.values():
+                if not all(url in completed for url in urls):
+                    return False
+                if any(url in results and has_data(results[url]) for url in urls):
+                    return True
+            return True
+
+        responses = self._probe_endpoints(
+            method,
+            [url for urls in sparse.values() for url in urls],
+            stop=earlier_template_hit
+        )
+
+        for template, urls in sparse.items():
+            if not any(url in responses and has_data(responses[url]) for url in urls):
+                continue
+
+            dense = expand(template, _MALL_IDS)
+            responses.update(self._probe_endpoints(method, [url for url in dense if url not in urls]))
+            return template, [(mall_id, url, responses[url]) for url, mall_id in dense.items() if url in responses]
+
+        return None, []
 
+    def _probe_endpoints(
+        self,
+        method: str,
+        urls: List[str],
+        timeout: int = 5,
+        stop: Optional[Callable[[set, Dict[str, object]], bool]] = None
+    ) -> Dict[str, object]:
+        """
+        Request candidate API URLs concurrently
+
+        Args:
+            method: HTTP method
+            urls: Candidate URLs (duplicates are fetched once)
+            timeout: Per-request timeout in seconds (probes fail fast)
+            stop: Optional predicate (completed URLs, results so far) → True to
+                  cancel the probes that have not started yet
+
+        Returns:
+            Dict mapping URL → decoded JSON body, for URLs that answered 200 with JSON
+        """
+        def probe(url: str):
+            resp = self.session.request(method, url, timeout=timeout)
+            if resp.status_code == 200:
+                try:
+                    return json_loads(resp.content)  # Raw bytes - skips decoding to str first
+                except ValueError:
+                    return resp.json()  # Non-UTF-8 body: let requests detect the charset
+            raise ValueError(f"HTTP {resp.status_code}")
+
+        unique_urls = list(dict.fromkeys(urls))
+        results = {}
+        completed = set()
+        executor = ThreadPoolExecutor(max_workers=min(_PROBE_WORKERS, len(unique_urls) or 1))
+        try:
+            futures = {executor.submit(probe, url): url for url in unique_urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                completed.add(url)
+                try:
+                    results[url] = future.result()
+                except Exception:
+                    pass  # Dead endpoint / non-JSON body - same as a failed probe
+
+                if stop is not None and stop(completed, results):
+                    break
+        finally:
+            # Don't wait on probes still in flight once the answer is known
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
+
+    @staticmethod
+    def _probe_items(data) -> list:
+        """List of records in a probed API response (checks common wrapper keys)"""
+        if isinstance(data, list):
+            items = data
+        elif isinstance(data, dict):
+            # Try common data paths
+            items = (data.get('data') or data.get('shops') or
+                    data.get('stores') or data.get('items') or
+                    data.get('tenants') or [])
+        else:
+            items = []
+        return items if isinstance(items, list) else []
+
+    def _extract_via_html(self, config: Dict, soup: BeautifulSoup):
+        """Extract data via HTML selectors"""
         list_selector = config.get('list_selector', '')
         field_selectors = config.get('field_selectors', {})
 
-        soup = BeautifulSoup(html, 'html.parser')
-        items = soup.select(list_selector)
+        # Compile selectors once instead of per item × field
+        compiled_fields = {field: sv.compile(selector) for field, selector in field_selectors.items()}
+        items = sv.compile(list_selector).select(soup)
 
         logger.info(f"Found {len(items)} items with selector: {list_selector}")
 
+        raw_items = []
         for item in items:
             raw_data = {}
-            for field, selector in field_selectors.items():
-                elem = item.select_one(selector)
+            for field, selector in compiled_fields.items():
+                elem = selector.select_one(item)
                 if elem:
                     raw_data[field] = elem.get_text(strip=True)
-
-            if raw_data:
-                record = RawRecord(
-                    source_url=self.root_url,
-                    source_section="html",
-                    scraped_at=datetime.now().isoformat(),
-                    raw_data=raw_data,
-                    extraction_method="ai_config_html"
-                )
-                self.raw_records.append(record)
+            raw_items.append(raw_data)
+
+        scraped_at = datetime.now().isoformat()
+        self._add_records([
+            RawRecord(
+                source_url=self.root_url,
+                source_section="html",
+                scraped_at=scraped_at,
+                raw_data=raw_data,
+                extraction_method="ai_config_html"
+            )
+            for raw_data in raw_items if raw_data
+        ])
 
         logger.info(f"✅ Extracted {len(self.raw_records)} records via HTML")
 
     def _extract_via_embedded_json(self, config: Dict, html: str):
         """Extract data from embedded JSON in script tags"""
-        from bs4 import BeautifulSoup
-
         script_pattern = config.get('script_pattern', '')
-        data_path = config.get('data_path', '')
+        path_keys = _data_path_keys(config.get('data_path', ''))
 
-        soup = BeautifulSoup(html, 'html.parser')
-
-        for script in soup.find_all('script'):
-            text = script.string or ''
+        for text in _SCRIPT_RE.findall(html):
             if script_pattern in text:
                 # Try to extract JSON
-                import re
-                json_match = re.search(r'\{.*\}', text, re.DOTALL)
+                json_match = _JSON_OBJECT_RE.search(text)
                 if json_match:
                     try:
-                        data = json.loads(json_match.group())
+                        data = json_loads(json_match.group())
 
                         # Navigate data path
-                        for key in data_path.split('.'):
-                            data = data.get(key, data)
+                        data = _walk_data_path(data, path_keys)
 
                         if isinstance(data, list):
-                            for item in data:
-                                record = RawRecord(
+                            scraped_at = datetime.now().isoformat()
+                            self._add_records([
+                                RawRecord(
                                     source_url=self.root_url,
                                     source_section="json_embedded",
-                                    scraped_at=datetime.now().isoformat(),
+                                    scraped_at=scraped_at,
                                     raw_data=item,
                                     extraction_method="ai_config_json"
                                 )
-                                self.raw_records.append(record)
+                                for item in data
+                            ])
                             break
                     except:
                         continue
@@ -664,97 +1100,85 @@ class AutonomousMallScraper:
 
     def _extract_via_embedded_json_auto(self, html: str):
         """Automatic: Extract JSON from script tags without config"""
-        from bs4 import BeautifulSoup
-        import re
-
-        soup = BeautifulSoup(html, 'html.parser')
-
-        for script in soup.find_all('script'):
-            text = script.string or ''
-
+        for text in _SCRIPT_RE.findall(html):
             # Look for array-like structures that might be shops
-            array_patterns = [
-                r'\bshops?\s*[:=]\s*(\[[\s\S]{100,5000}?\])',
-                r'\bstores?\s*[:=]\s*(\[[\s\S]{100,5000}?\])',
-                r'\bitems?\s*[:=]\s*(\[[\s\S]{100,5000}?\])',
-                r'\bdata\s*[:=]\s*(\[[\s\S]{100,5000}?\])',
-            ]
-
-            for pattern in array_patterns:
-                matches = re.findall(pattern, text, re.I)
-                for match in matches:
+            for pattern in _JSON_ARRAY_KEY_PATTERNS:
+                for key_match in pattern.finditer(text):
+                    start = key_match.end()
+                    end = _json_block_at(text, start, 5002)
+                    if end == -1 or end - start < 102:
+                        continue
                     try:
-                        data = json.loads(match)
+                        data = json_loads(text[start:end])
                         if isinstance(data, list) and len(data) > 2:
                             # Looks like a list of items
-                            for item in data:
-                                if isinstance(item, dict):
-                                    record = RawRecord(
-                                        source_url=self.root_url,
-                                        source_section="json_auto",
-                                        scraped_at=datetime.now().isoformat(),
-                                        raw_data=item,
-                                        extraction_method="auto_json"
-                                    )
-                                    self.raw_records.append(record)
+                            scraped_at = datetime.now().isoformat()
+                            self._add_records([
+                                RawRecord(
+                                    source_url=self.root_url,
+                                    source_section="json_auto",
+                                    scraped_at=scraped_at,
+                                    raw_data=item,
+                                    extraction_method="auto_json"
+                                )
+                                for item in data if isinstance(item, dict)
+                            ])
                             logger.info(f"✅ Auto-extracted {len(data)} records from embedded JSON")
                             return
                     except:
                         continue
 
-    def _extract_via_html_auto(self, html: str):
+    def _extract_via_html_auto(self, soup: BeautifulSoup):
         """Automatic: Extract from HTML without config by finding repeated patterns"""
-        from bs4 import BeautifulSoup
-
-        soup = BeautifulSoup(html, 'html.parser')
-
         # Find repeated element structures that look like shop cards
-        class_counter = {}
-        for tag in soup.find_all(class_=True):
-            # Filter out likely non-data elements
-            text = tag.get_text(strip=True)
-
+        class_counter = Counter()
+        class_tags = _class_tags(soup)
+        link_holders = _link_ancestor_ids(soup)
+        card_texts: Dict[int, str] = {}  # id(tag) → stripped text, reused for the extracted items
+        for tag in class_tags:
+            # Filter out likely non-data elements - cheapest checks first, the
+            # subtree text walk last
             # Skip if:
-            # - Too short (< 10 chars) - likely UI elements like buttons
-            # - Contains no link - shop cards usually link to detail pages
             # - Is a common UI element (button, dropdown, icon)
-            if len(text) < 10:
+            # - Contains no link - shop cards usually link to detail pages
+            # - Too short (< 10 chars) - likely UI elements like buttons
+            # (keywords have no spaces, so searching the sorted class key is the
+            # same as searching the classes in their original order)
+            classes = ' '.join(sorted(tag.attrs['class']))
+            if not classes or _UI_CLASS_RE.search(classes):
                 continue
 
-            has_link = tag.name == 'a' or tag.find('a')
+            has_link = tag.name == 'a' or id(tag) in link_holders
             if not has_link:
                 continue
 
-            # Skip common UI element class names
-            classes_str = ' '.join(tag.get('class', []))
-            if any(skip in classes_str.lower() for skip in ['button', 'btn', 'dropdown', 'icon', 'menu', 'nav']):
+            text = card_texts[id(tag)] = tag.get_text(strip=True)
+            if len(text) < 10:
                 continue
 
-            classes = ' '.join(sorted(tag.get('class', [])))
-            if classes:
-                class_counter[classes] = class_counter.get(classes, 0) + 1
+            class_counter[classes] += 1
 
-        # Get elements that repeat 10+ times (likely shop cards)
-        repeated = [(cls, count) for cls, count in class_counter.items() if count >= 10]
-        if not repeated:
+        # Get the most repeated element if it repeats 10+ times (likely shop cards)
+        repeated = class_counter.most_common(1)
+        if not repeated or repeated[0][1] < 10:
             logger.warning("No repeated shop card patterns found (need 10+ occurrences with links and text > 10 chars)")
             logger.warning("This page may require Playwright for JavaScript rendering")
             return
 
-        repeated.sort(key=lambda x: x[1], reverse=True)
-        top_class = repeated[0][0]
-        count = repeated[0][1]
+        top_class, count = repeated[0]
 
         logger.info(f"Found repeated pattern: '{top_class[:50]}...' ({count} times)")
 
         # Extract all instances
-        items = soup.find_all(class_=top_class.split())
+        items = _tags_with_any_class(class_tags, top_class.split())
+        scraped_at = datetime.now().isoformat()
 
         for item in items[:200]:  # Limit to first 200
             # Extract all text content
+            text = card_texts.get(id(item))
             raw_data = {
-                "text": item.get_text(strip=True),
-                "html": str(item)[:500]
+                "text": text if text is not None else item.get_text(strip=True),
+                "html": _html_snippet(item, 500)
             }
 
             # Extract shop name - try multiple strategies
@@ -780,23 +1204,17 @@ class AutonomousMallScraper:
 
             # Strategy 3: Look for elements with "name", "title", "shop", "store" in class
             if not shop_name:
-                name_candidates = item.find_all(class_=lambda c: c and any(
-                    keyword in ' '.join(c).lower()
-                    for keyword in ['name', 'title', 'shop', 'store', 'brand']
-                ))
-                if name_candidates:
-                    shop_name = name_candidates[0].get_text(strip=True)
+                name_candidate = _NAME_CLASS_SELECTOR.select_one(item)
+                if name_candidate is not None:
+                    shop_name = name_candidate.get_text(strip=True)
 
             # Strategy 4: Look for largest text block (likely the name)
             if not shop_name:
-                text_elements = item.find_all(['div', 'span', 'p'])
-                text_blocks = [(elem.get_text(strip=True), len(elem.get_text(strip=True)))
-                              for elem in text_elements]
-                # Filter: reasonable length (3-100 chars), not too short, not entire card
-                candidates = [text for text, length in text_blocks
-                             if 3 < length < 100]
-                if candidates:
-                    shop_name = candidates[0]
+                # First block of reasonable length (3-100 chars), not too short, not entire card;
+                # walks the subtree lazily and stops at the first hit
+                text_blocks = (elem.get_text(strip=True) for elem in item.descendants
+                               if isinstance(elem, Tag) and elem.name in _TEXT_BLOCK_TAGS)
+                shop_name = next((text for text in text_blocks if 3 < len(text) < 100), None)
 
             # Store the shop name we found
             if shop_name:
@@ -808,14 +1226,13 @@ class AutonomousMallScraper:
                 raw_data.update(data_attrs)
 
             if raw_data.get("text") or raw_data.get("heading"):
-                record = RawRecord(
+                self._add_record(RawRecord(
                     source_url=self.root_url,
                     source_section="html_auto",
-                    scraped_at=datetime.now().isoformat(),
+                    scraped_at=scraped_at,
                     raw_data=raw_data,
                     extraction_method="auto_html"
-                )
-                self.raw_records.append(record)
+                ))
 
         logger.info(f"✅ Auto-extracted {len(self.raw_records)} records from HTML patterns")
 
@@ -859,295 +1276,267 @@ class AutonomousMallScraper:
                 # Get rendered HTML
                 rendered_html = page.content()
 
-                # Note: Don't close browser yet if we need to click details
-
                 logger.info("✅ Page rendered successfully")
 
                 # Now use auto HTML extraction on the rendered content
-                from bs4 import BeautifulSoup
-                soup = BeautifulSoup(rendered_html, 'html.parser')
+                # Pure tree queries here, so use lxml directly (compiled XPath, no bs4 wrapper per node)
+                tree = lxml_html.fromstring(rendered_html)
 
                 # Find repeated element structures that look like shop cards
-                class_counter = {}
-                for tag in soup.find_all(class_=True):
-                    text = tag.get_text(strip=True)
-
-                    # Skip too short or too long text (shop cards usually 20-500 chars)
-                    if len(text) < 20 or len(text) > 500:
+                class_counter = Counter()
+                class_tags = _LXML_CLASS_TAGS(tree)
+                link_holders = _lxml_link_holders(tree)
+                card_texts: Dict[int, str] = {}  # id(element) → stripped text, reused for the extracted items
+                for tag in class_tags:
+                    # Cheapest checks first, the subtree text walk last
+                    # Skip UI elements (match on the sorted class key, also used for counting)
+                    classes = ' '.join(sorted(tag.get('class').split()))
+                    if not classes or _RENDERED_UI_CLASS_RE.search(classes):
                         continue
 
                     # Must have a link
-                    has_link = tag.name == 'a' or tag.find('a')
+                    has_link = tag.tag == 'a' or tag in link_holders
                     if not has_link:
                         continue
 
-                    # Skip UI elements
-                    classes_str = ' '.join(tag.get('class', []))
-                    if any(skip in classes_str.lower() for skip in ['button', 'btn', 'dropdown', 'icon', 'menu', 'nav', 'filter', 'header', 'footer']):
+                    # Skip too short or too long text (shop cards usually 20-500 chars)
+                    text = card_texts[id(tag)] = _lxml_text(tag, strip=True)
+                    if len(text) < 20 or len(text) > 500:
                         continue
 
                     # Skip elements that look like non-shop content
                     # - Opening hours: "星期" (day of week), time patterns
                     # - Too many numbers without letters (likely not a shop name)
-                    if any(pattern in text for pattern in ['星期一', '星期二', '星期三', '星期四', '星期五', '星期六', '星期日', '公眾假期']):
+                    if _WEEKDAY_RE.search(text):
                         continue
 
                     # Must have some alphabetic content (shop names have letters)
-                    import re
-                    if not re.search(r'[A-Za-z\u4e00-\u9fff]', text):
+                    if not _HAS_LETTER_RE.search(text):
                         continue
 
-                    classes = ' '.join(sorted(tag.get('class', [])))
-                    if classes:
-                        class_counter[classes] = class_counter.get(classes, 0) + 1
+                    class_counter[classes] += 1
 
-                # Get elements that repeat 10+ times (likely shop cards)
-                repeated = [(cls, count) for cls, count in class_counter.items() if count >= 10]
+                # Get the most repeated element if it repeats 10+ times (likely shop cards)
+                repeated = class_counter.most_common(1)
 
-                if not repeated:
+                if not repeated or repeated[0][1] < 10:
                     logger.warning("No repeated shop card patterns found even after JavaScript rendering")
                     return
 
-                repeated.sort(key=lambda x: x[1], reverse=True)
-                top_class = repeated[0][0]
-                count = repeated[0][1]
+                top_class, count = repeated[0]
 
                 logger.info(f"Found repeated pattern in rendered page: '{top_class[:50]}...' ({count} times)")
 
                 # Extract all instances
-                items = soup.find_all(class_=top_class.split())
+                wanted = set(top_class.split())
+                items = [tag for tag in class_tags if not wanted.isdisjoint(tag.get('class').split())]
+                scraped_at = datetime.now().isoformat()  # Page render time, shared by its records
+                detail_jobs = []  # (raw_data, detail URL) - visited after the listing pass
 
                 for item in items[:200]:
+                    text = card_texts.get(id(item))
                     raw_data = {
-                        "text": item.get_text(strip=True),
-                        "html": str(item)[:500]
+                        "text": text if text is not None else _lxml_text(item, strip=True),
+                        "html": _lxml_snippet(item, 500)  # First 500 chars
                     }
 
                     # Extract shop name - try multiple strategies
                     shop_name = None
 
                     # Strategy 1: Look for headings (h1-h6)
-                    headings = item.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+                    headings = _LXML_HEADINGS(item)
                     if headings:
-                        shop_name = headings[0].get_text(strip=True)
+                        shop_name = _lxml_text(headings[0], strip=True)
 
                     # Strategy 2: Look for anchor text (links often contain shop names)
                     if not shop_name:
-                        links = item.find_all('a', href=True)
+                        links = _LXML_LINKS(item)
                         if links:
                             # Store all link URLs
                             raw_data["links"] = [a.get('href') for a in links[:3]]
                             # Use first substantial link text as name
                             for link in links:
-                                link_text = link.get_text(strip=True)
+                                link_text = _lxml_text(link, strip=True)
                                 if len(link_text) > 2 and len(link_text) < 100:
                                     shop_name = link_text
                                     break
 
                     # Strategy 3: Look for elements with "name", "title", "shop", "store" in class
                     if not shop_name:
-                        name_candidates = item.find_all(class_=lambda c: c and any(
-                            keyword in ' '.join(c).lower()
-                            for keyword in ['name', 'title', 'shop', 'store', 'brand']
-                        ))
+                        name_candidates = _LXML_NAME_CLASS(item)
                         if name_candidates:
-                            shop_name = name_candidates[0].get_text(strip=True)
+                            shop_name = _lxml_text(name_candidates[0], strip=True)
 
                     # Strategy 4: Look for largest text block (likely the name)
                     if not shop_name:
-                        text_elements = item.find_all(['div', 'span', 'p'])
-                        text_blocks = [(elem.get_text(strip=True), len(elem.get_text(strip=True)))
-                                      for elem in text_elements]
-                        # Filter: reasonable length (3-100 chars), not too short, not entire card
-                        candidates = [text for text, length in text_blocks
-                                     if 3 < length < 100]
-                        if candidates:
-                            shop_name = candidates[0]
+                        # First block of reasonable length (3-100 chars), not too short, not entire card;
+                        # walks the subtree lazily and stops at the first hit
+                        text_blocks = (_lxml_text(elem, strip=True)
+                                       for elem in item.iterdescendants(*_TEXT_BLOCK_TAGS))
+                        shop_name = next((text for text in text_blocks if 3 < len(text) < 100), None)
 
                     # Clean up shop name
                     if shop_name:
-                        import re
                         # Remove common noise patterns like floor/unit info from name
                         # e.g., "Shop Name一期, L3, 357舖" -> "Shop Name"
-                        shop_name = re.split(r'[,，]', shop_name)[0].strip()
+                        shop_name = _LOCATION_SPLIT_RE.split(shop_name, 1)[0].strip()
                         # Remove trailing location indicators
-                        shop_name = re.sub(r'\s*(一期|二期|三期|LB|UB|L\d+|G/F|B\d+|舖).*$', '', shop_name).strip()
+                        shop_name = _NAME_TAIL_RE.sub('', shop_name).strip()
 
                     # Store the shop name we found
                     if shop_name and len(shop_name) > 1:
                         raw_data["heading"] = shop_name
 
                     # Extract data attributes
-                    data_attrs = {k: v for k, v in item.attrs.items() if k.startswith('data-')}
+                    data_attrs = {k: v for k, v in item.attrib.items() if k.startswith('data-')}
                     if data_attrs:
                         raw_data.update(data_attrs)
 
-                    # DEEP EXTRACTION: Click into shop detail page if requested
+                    if not (raw_data.get("text") or raw_data.get("heading")):
+                        continue
+                    if not self._add_record(RawRecord(
+                        source_url=url,
+                        source_section="playwright_auto",
+                        scraped_at=scraped_at,
+                        raw_data=raw_data,
+                        extraction_method="playwright"
+                    )):
+                        continue  # Duplicate card - no need to visit its detail page either
+
+                    # DEEP EXTRACTION: queue the shop detail page if requested
                     if click_details and raw_data.get("links"):
-                        detail_link = raw_data["links"][0]
-
                         # Make link absolute if relative
-                        from urllib.parse import urljoin
-                        detail_url = urljoin(url, detail_link)
-
-                        try:
-                            logger.debug(f"Clicking into detail page: {detail_url}")
-                            page.goto(detail_url, wait_until='networkidle', timeout=30000)
-                            page.wait_for_timeout(2000)
-
-                            # Extract floor and shop number from detail page
-                            detail_content = page.content()
-                            detail_soup = BeautifulSoup(detail_content, 'html.parser')
-
-                            # Look for shop code / floor information in common locations
-                            # Strategy 1: Look for text with patterns like "Shop LB-06", "Unit G-123", etc.
-                            detail_text = detail_soup.get_text()
-
-                            # Strategy 2: Look for labeled fields (Shop No, Floor, Unit, etc.)
-                            import re
-                            shop_code_patterns = [
-                                r'Shop\s*(?:No|Number|Code)?[:\s]+([A-Z0-9\-]+)',
-                                r'Unit\s*(?:No|Number|Code)?[:\s]+([A-Z0-9\-]+)',
-                                r'店鋪編號[:\s]+([A-Z0-9\-]+)',
-                                r'舖位編號[:\s]+([A-Z0-9\-]+)',
-                            ]
-
-                            floor_code_patterns = [
-                                r'Floor[:\s]+([A-Z0-9\-]+)',
-                                r'樓層[:\s]+([A-Z0-9\-]+)',
-                            ]
-
-                            extracted_shop_code = None
-                            extracted_floor = None
-
-                            # Try to extract shop code
-                            for pattern in shop_code_patterns:
-                                match = re.search(pattern, detail_text, re.I)
-                                if match:
-                                    extracted_shop_code = match.group(1).strip()
-                                    logger.debug(f"Extracted shop code from detail: {extracted_shop_code}")
-                                    break
-
-                            # Try to extract floor
-                            for pattern in floor_code_patterns:
-                                match = re.search(pattern, detail_text, re.I)
-                                if match:
-                                    extracted_floor = match.group(1).strip()
-                                    logger.debug(f"Extracted floor from detail: {extracted_floor}")
-                                    break
-
-                            # Store extracted info if found
-                            if extracted_shop_code:
-                                raw_data["shop_code_detail"] = extracted_shop_code
-                            if extracted_floor:
-                                raw_data["floor_detail"] = extracted_floor
-
-                            # Go back to listing page for next iteration
-                            page.go_back(wait_until='networkidle', timeout=30000)
-                            page.wait_for_timeout(1000)
-
-                        except Exception as e:
-                            logger.warning(f"Failed to extract from detail page {detail_url}: {e}")
-                            # Try to go back to listing page
-                            try:
-                                page.go_back(timeout=10000)
-                            except:
-                                # If go_back fails, reload the listing page
-                                page.goto(url, wait_until='networkidle', timeout=30000)
-                                page.wait_for_timeout(2000)
-
-                    if raw_data.get("text") or raw_data.get("heading"):
-                        record = RawRecord(
-                            source_url=url,
-                            source_section="playwright_auto",
-                            scraped_at=datetime.now().isoformat(),
-                            raw_data=raw_data,
-                            extraction_method="playwright"
-                        )
-                        self.raw_records.append(record)
+                        detail_jobs.append((raw_data, urljoin(url, raw_data["links"][0])))
 
                 # Close browser
                 browser.close()
 
-                logger.info(f"✅ Auto-extracted {len(self.raw_records)} records via Playwright")
-
-        except Exception as e:
-            logger.error(f"Playwright extraction failed: {e}", exc_info=True)
-
-    def _deduplicate_records(self):
-        """Remove duplicate raw records based on content hash"""
-        if not self.raw_records:
-            return
+            # Render all detail pages concurrently, then fill in the records' detail fields
+            if detail_jobs:
+                detail_urls = list(dict.fromkeys(detail_url for _, detail_url in detail_jobs))
+                logger.info(f"Visiting {len(detail_urls)} shop detail pages...")
+                detail_texts = asyncio.run(self._render_detail_texts(detail_urls))
 
-        original_count = len(self.raw_records)
-        seen_hashes = set()
-        unique_records = []
+                for raw_data, detail_url in detail_jobs:
+                    detail_text = detail_texts.get(detail_url)
+                    if detail_text is None:
+                        continue
 
-        for record in self.raw_records:
-            # Create hash from key identifying fields
-            data = record.raw_data
+                    # Look for labeled fields (Shop No, Floor, Unit, etc.)
+                    for pattern in _DETAIL_SHOP_CODE_PATTERNS:
+                        match = pattern.search(detail_text)
+                        if match:
+                            raw_data["shop_code_detail"] = match.group(1).strip()
+                            logger.debug(f"Extracted shop code from detail: {raw_data['shop_code_detail']}")
+                            break
 
-            # Extract key fields for hash (name + location/text)
-            name = (data.get('heading') or data.get('name') or
-                   data.get('name_tc') or data.get('name_en') or '')
-            text = data.get('text', '')
-            location = data.get('location', '')
+                    for pattern in _DETAIL_FLOOR_PATTERNS:
+                        match = pattern.search(detail_text)
+                        if match:
+                            raw_data["floor_detail"] = match.group(1).strip()
+                            logger.debug(f"Extracted floor from detail: {raw_data['floor_detail']}")
+                            break
 
-            # Create composite key
-            key = f"{name}|{text}|{location}".lower().strip()
+            logger.info(f"✅ Auto-extracted {len(self.raw_records)} records via Playwright")
 
-            # Hash the key
-            import hashlib
-            record_hash = hashlib.md5(key.encode('utf-8')).hexdigest()
+        except Exception as e:
+            logger.error(f"Playwright extraction failed: {e}", exc_info=True)
 
-            if record_hash not in seen_hashes:
-                seen_hashes.add(record_hash)
-                unique_records.append(record)
+    async def _render_detail_texts(self, urls: List[str]) -> Dict[str, str]:
+        """
+        Render shop detail pages on a pool of browser pages
 
-        duplicates_removed = original_count - len(unique_records)
-        if duplicates_removed > 0:
-            logger.info(f"🔍 Removed {duplicates_removed} duplicate records ({len(unique_records)} unique)")
-            self.raw_records = unique_records
+        Args:
+            urls: Detail page URLs (each visited once)
 
-    def _infer_category_from_url(self, url: str) -> Optional[str]:
+        Returns:
+            Dict mapping URL → page text, for pages that rendered
+        """
+        from playwright.async_api import async_playwright
+
+        queue = asyncio.Queue()
+        for detail_url in urls:
+            queue.put_nowait(detail_url)
+        texts = {}
+
+        async def worker(page):
+            # Each worker navigates its own page straight to the next URL - no go_back
+            while not queue.empty():
+                detail_url = queue.get_nowait()
+                try:
+                    logger.debug(f"Opening detail page: {detail_url}")
+                    await page.goto(detail_url, wait_until='networkidle', timeout=30000)
+                    await page.wait_for_timeout(2000)
+                    # Strategy 1: text with patterns like "Shop LB-06", "Unit G-123", etc.
+                    texts[detail_url] = _lxml_text(lxml_html.fromstring(await page.content()))
+                except Exception as e:
+                    logger.warning(f"Failed to extract from detail page {detail_url}: {e}")
+
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            try:
+                # One shared context: workers reuse its HTTP cache (site CSS/JS/images) and cookies
+                context = await browser.new_context()
+                pages = [await context.new_page() for _ in range(min(_DETAIL_PAGE_WORKERS, len(urls)))]
+                await asyncio.gather(*(worker(page) for page in pages))
+            finally:
+                await browser.close()
+
+        return texts
+
+    @staticmethod
+    def _record_key(data: Dict) -> str:
+        """Dedup key of a raw record: its identifying fields (name + location/text)"""
+        name = (data.get('heading') or data.get('name') or
+               data.get('name_tc') or data.get('name_en') or '')
+        text = data.get('text', '')
+        location = data.get('location', '')
+        return f"{name}|{text}|{location}".lower().strip()
+
+    def _add_record(self, record: RawRecord) -> bool:
+        """Append a raw record unless one with the same key was already extracted"""
+        key = self._record_key(record.raw_data)
+        if key in self._record_keys:
+            self._duplicates_skipped += 1
+            return False
+        self._record_keys.add(key)
+        self.raw_records.append(record)
+        return True
+
+    def _add_records(self, records: List[RawRecord]):
+        """Append a batch of raw records, dropping duplicates as they arrive"""
+        for record in records:
+            self._add_record(record)
+
+    def _report_duplicates(self):
+        """Log how many duplicate records extraction dropped"""
+        if self._duplicates_skipped > 0:
+            logger.info(f"🔍 Removed {self._duplicates_skipped} duplicate records ({len(self.raw_records)} unique)")
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _infer_category_from_url(url: str) -> Optional[str]:
         """
-        Infer category from URL path segments
+        Infer category from URL path segments (memoized - records share listing URLs)
 
         Common patterns:
         - /shopping/ or /時尚購物/ → Shopping
         - /dining/ or /餐飲/ → Dining
         - /entertainment/ or /娛樂/ → Entertainment
         """
-        import re
-        from urllib.parse import unquote
-
-        # Decode URL to handle Chinese characters
-        url = unquote(url)
-
-        # Common category mappings (Chinese & English)
-        category_patterns = {
-            # Shopping
-            r'(?:shopping|shop|時尚|購物|fashion|retail|boutique)': 'Shopping',
-            # Dining
-            r'(?:dining|food|restaurant|餐飲|美食|cafe|coffee)': 'Dining',
-            # Entertainment
-            r'(?:entertainment|娛樂|消閒|leisure|recreation)': 'Entertainment',
-            # Lifestyle
-            r'(?:lifestyle|生活|品味|wellness|beauty|健康)': 'Lifestyle',
-            # Services
-            r'(?:service|服務|medical|clinic|bank|atm)': 'Services',
-        }
-
-        # Search for patterns in URL path
-        for pattern, category in category_patterns.items():
-            if re.search(pattern, url, re.I):
-                return category
+        # Decode the path only (the host and query string are not category segments)
+        path = unquote(urlparse(url).path)
 
-        return None
+        # One scan for all categories, in priority order
+        match = _CATEGORY_RE.match(path)
+        return match.lastgroup if match else None
 
     def _normalize_data(self):
         """Step 3: Normalize to canonical schema"""
         self.normalized_records = []
+        self._apply_stored_floor_mapping()
+        # location → (floor, shop number); a mall has few distinct location strings
+        parsed_locations: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
 
         for raw in self.raw_records:
             data = raw.raw_data
@@ -1162,11 +1551,10 @@ class AutonomousMallScraper:
                 # Fallback: Extract name from comma-separated text format
                 # Format: "Shop Name一期, L3, 301舖" → name = "Shop Name"
                 if not name and location:
-                    import re
                     # Split by comma and take first segment, remove phase markers (一期, 二期, etc.)
-                    first_segment = re.split(r'[,，]', location)[0].strip()
+                    first_segment = _LOCATION_SPLIT_RE.split(location, 1)[0].strip()
                     # Remove phase/building markers: 一期, 二期, 三期, Phase 1, etc.
-                    name = re.sub(r'\s*(一期|二期|三期|四期|Phase\s*[0-9]+)\s*$', '', first_segment, flags=re.I).strip()
+                    name = _PHASE_SUFFIX_RE.sub('', first_segment).strip()
                     if name:
                         logger.debug(f"Extracted name '{name}' from text field: {location[:50]}")
             else:
@@ -1184,7 +1572,10 @@ class AutonomousMallScraper:
             website = data.get('url') or data.get('website')
 
             # Extract floor and shop number from location text
-            floor_from_location, shop_from_location = extract_floor_and_shop_from_location(location)
+            parsed = parsed_locations.get(location)
+            if parsed is None:
+                parsed = parsed_locations[location] = extract_floor_and_shop_from_location(location)
+            floor_from_location, shop_from_location = parsed
 
             # Parse detail page shop code (format: "LB-06", "G-123", "L3-456", etc.)
             floor_from_detail = data.get('floor_detail')
@@ -1192,9 +1583,8 @@ class AutonomousMallScraper:
 
             # If shop_code_detail contains floor info (e.g., "LB-06"), parse it
             if shop_from_detail and not floor_from_detail:
-                import re
                 # Try to split shop code into floor + shop number
-                match = re.match(r'^([A-Z]+[0-9]*)[:\-\s]+([0-9A-Z]+)$', str(shop_from_detail), re.I)
+                match = _SHOP_CODE_SPLIT_RE.match(str(shop_from_detail))
                 if match:
                     floor_from_detail = match.group(1).upper()
                     shop_from_detail = match.group(2).upper()
@@ -1209,7 +1599,7 @@ class AutonomousMallScraper:
                 floor_canonical = data.get('floor')
 
             # Priority 2: Use AI-discovered malllevel_id mapping (if available)
-            if not floor_canonical and hasattr(self.config, 'floor_mapping') and self.config.floor_mapping:
+            if not floor_canonical and self.config.floor_mapping:
                 level_id = data.get('malllevel_id')
                 if level_id in self.config.floor_mapping:
                     floor_canonical = self.config.floor_mapping[level_id]
@@ -1236,26 +1626,16 @@ class AutonomousMallScraper:
             # Smart floor inference: If floor is still missing, try to infer from shop number
             if not floor_canonical and shop_no:
                 # Extract floor prefix from shop number (e.g., "G123" → G, "L3-456" → L3, "B1-02" → B1)
-                import re
                 shop_str = str(shop_no)
 
                 # Try specific floor patterns first (most specific to least specific)
-                floor_patterns = [
-                    (r'^(LB|UB|LG|UG|UC|LC)(?:[0-9])', r'\1'),  # LB06 → LB, UB04 → UB
-                    (r'^(L[0-9]+|B[0-9]+|P[0-9]+|M[0-9]*)', r'\1'),  # L3-456 → L3, B1-02 → B1
-                    (r'^(G|C)(?:[^A-Z]|$)', r'\1'),  # G123 → G, C-05 → C (but not GA, CA)
-                ]
-
-                for pattern, replacement in floor_patterns:
-                    match = re.match(pattern, shop_str, re.I)
-                    if match:
-                        potential_floor = match.expand(replacement).upper()
-                        # Validate it looks like a floor code
-                        valid_floor_pattern = r'^(G|B[0-9]+|L[0-9]+|LB|UB|LG|UG|C|UC|LC|M[0-9]*|P[0-9]+)$'
-                        if re.match(valid_floor_pattern, potential_floor):
-                            floor_canonical = potential_floor
-                            logger.debug(f"Inferred floor {floor_canonical} from shop_number {shop_no}")
-                            break
+                match = _SHOP_NO_FLOOR_RE.match(shop_str)
+                if match:
+                    potential_floor = match.group(match.lastindex).upper()
+                    # Validate it looks like a floor code
+                    if _VALID_FLOOR_RE.match(potential_floor):
+                        floor_canonical = potential_floor
+                        logger.debug(f"Inferred floor {floor_canonical} from shop_number {shop_no}")
 
             # Default missing floors to Ground for API-based extractions (common pattern)
             if not floor_canonical and raw.extraction_method in ("ai_config_api", "ai_config_api_variation"):
@@ -1300,28 +1680,50 @@ class AutonomousMallScraper:
         total = len(self.normalized_records)
         required_fields = ['name', 'floor', 'shop_number', 'category']
 
-        # Calculate coverage
-        field_coverage = {}
-        missing_fields = {}
+        max_samples = 5  # Show up to 5 examples per issue
 
-        for field in required_fields:
-            populated = sum(
-                1 for r in self.normalized_records
-                if getattr(r, field, None) is not None
-            )
-            field_coverage[field] = populated / total
-            missing_fields[field] = total - populated
+        # Column-wise counts: one C-level map/count per field instead of a getattr per record and field
+        records = self.normalized_records
+        columns = {field: list(map(attrgetter(field), records)) for field in required_fields}
+        missing_fields = {field: column.count(None) for field, column in columns.items()}
+        field_coverage = {field: (total - missing_fields[field]) / total for field in required_fields}
+
+        # Sample records missing each field (for debugging) - located with list.index, no record loop
+        missing_samples = {}
+        for field, column in columns.items():
+            samples, i = [], -1
+            for _ in range(min(missing_fields[field], max_samples)):
+                i = column.index(None, i + 1)
+                r = records[i]
+                samples.append({
+                    "name": r.name or "(missing)",
+                    "floor": r.floor or "(missing)",
+                    "shop_number": r.shop_number or "(missing)",
+                    "category": r.category or "(missing)",
+                    "raw_floor": r.raw_floor or "",
+                    "source_url": r.source_url or "",
+                    "extraction_method": r.extraction_method or ""
+                })
+            missing_samples[field] = samples
+
+        # Find unknown floors (checked once per distinct value)
+        floor_column = columns['floor']
+        unknown_floors = {floor for floor in set(floor_column) if floor and not _VALID_FLOOR_RE.match(floor)}
+        unknown_floor_records = []
+        if unknown_floors:
+            unknown_rows = (i for i, floor in enumerate(floor_column) if floor in unknown_floors)
+            for i in islice(unknown_rows, max_samples):
+                r = records[i]
+                unknown_floor_records.append({
+                    "name": r.name or "(missing)",
+                    "floor": r.floor or "(missing)",
+                    "shop_number": r.shop_number or "(missing)",
+                    "raw_floor": r.raw_floor or "",
+                    "source_url": r.source_url or ""
+                })
 
         overall_coverage = sum(field_coverage.values()) / len(field_coverage)
 
-        # Find unknown floors
-        unknown_floors = set()
-        # Valid canonical formats: G, B1-B9, L1-L99, LB, UB, LG, UG, C, UC, LC, M, P1-P9
-        valid_floor_pattern = r'^(G|B[0-9]+|L[0-9]+|LB|UB|LG|UG|C|UC|LC|M[0-9]*|P[0-9]+)$'
-        for r in self.normalized_records:
-            if r.floor and not re.match(valid_floor_pattern, r.floor):
-                unknown_floors.add(r.floor)
-
         # Identify top failures
         failures = []
         for field, count in missing_fields.items():
@@ -1335,41 +1737,11 @@ class AutonomousMallScraper:
         failures.sort(key=lambda x: x['count'], reverse=True)
 
         # Collect sample records with issues (for debugging)
-        sample_issues = {}
-        max_samples = 5  # Show up to 5 examples per issue
-
-        # Sample records missing each field
-        for field in required_fields:
-            missing = [
-                {
-                    "name": r.name or "(missing)",
-                    "floor": r.floor or "(missing)",
-                    "shop_number": r.shop_number or "(missing)",
-                    "category": r.category or "(missing)",
-                    "raw_floor": r.raw_floor or "",
-                    "source_url": r.source_url or "",
-                    "extraction_method": r.extraction_method or ""
-                }
-                for r in self.normalized_records
-                if getattr(r, field, None) is None
-            ]
-            if missing:
-                sample_issues[f"missing_{field}"] = missing[:max_samples]
-
-        # Sample records with unknown floors
-        unknown_floor_records = [
-            {
-                "name": r.name or "(missing)",
-                "floor": r.floor or "(missing)",
-                "shop_number": r.shop_number or "(missing)",
-                "raw_floor": r.raw_floor or "",
-                "source_url": r.source_url or ""
-            }
-            for r in self.normalized_records
-            if r.floor and not re.match(valid_floor_pattern, r.floor)
-        ]
+        sample_issues = {
+            f"missing_{field}": samples for field, samples in missing_samples.items() if samples
+        }
         if unknown_floor_records:
-            sample_issues["unknown_floors"] = unknown_floor_records[:max_samples]
+            sample_issues["unknown_floors"] = unknown_floor_records
 
         # Log results
         logger.info(f"Total records: {total}")
@@ -1414,10 +1786,11 @@ class AutonomousMallScraper:
         if self.ai_client:
             # Get sample records with the issue
             field_name = top_issue['issue'].replace('Missing ', '')
-            sample_records = [
-                r.to_dict() for r in self.normalized_records
-                if getattr(r, field_name, None) is None
-            ][:5]
+            # Stop at the 5th match instead of filtering (and converting) every record
+            sample_records = list(islice(
+                (r.to_dict() for r in self.normalized_records if getattr(r, field_name, None) is None),
+                5
+            ))
 
             logger.info("\n🤖 Consulting AI agent for solution...")
             solution = self.ai_client.fix_data_quality_issue(
@@ -1440,11 +1813,11 @@ class AutonomousMallScraper:
         from ai.floor_mapper import FloorMapper
 
         # Check if we already have a mapping
-        if hasattr(self.config, 'floor_mapping') and self.config.floor_mapping:
+        if self.config.floor_mapping:
             logger.info("Floor mapping already exists - skipping discovery")
             return False
 
-        mapper = FloorMapper()
+        mapper = FloorMapper(cache_dir=CACHE_DIR / "floor_mapping", mall_name=self.mall_name)
 
         # Discover mapping from raw records
         mapping = mapper.discover_mapping(self.raw_records, self.ai_client)
@@ -1458,40 +1831,77 @@ class AutonomousMallScraper:
             logger.info(f"   malllevel_id {level_id} → {floor}")
 
         # SAVE mapping to config so it persists across iterations
-        if not hasattr(self.config, 'floor_mapping'):
-            self.config.floor_mapping = {}
         self.config.floor_mapping.update(mapping)
+        # Only AI mappings are reused by later runs - a heuristic guess is recomputed each time
+        if mapper.last_source in ("ai", "cache"):
+            self._save_floor_mapping(mapping)
 
         logger.info(f"✅ Saved floor mapping to config - will be used in next extraction")
         return True  # Trigger re-normalization
 
+    def _level_signature(self) -> str:
+        """Hash of the distinct malllevel_ids in the raw records (what a floor mapping is discovered for)"""
+        level_ids = {str(r.raw_data['malllevel_id']) for r in self.raw_records if r.raw_data.get('malllevel_id') is not None}
+        return hashlib.sha256(json_dumps(sorted(level_ids)).encode('utf-8')).hexdigest()
+
+    def _load_floor_mapping(self) -> Optional[Tuple[str, Dict[int, str]]]:
+        """Load (level signature, mapping) saved by a previous run, unless missing or older than DEFAULT_TTL"""
+        if not self._floor_mapping_file.exists():
+            return None
+        try:
+            stored = json_loads(self._floor_mapping_file.read_bytes())
+            if time.time() - stored.get('saved_at', 0) > DEFAULT_TTL:
+                logger.info(f"Stored floor mapping {self._floor_mapping_file} has expired - rediscovering")
+                return None
+            return stored['signature'], {int(k): v for k, v in stored['mapping'].items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable floor mapping {self._floor_mapping_file}: {e}")
+            return None
+
+    def _save_floor_mapping(self, mapping: Dict[int, str]):
+        """Persist an AI-discovered mapping with the level signature it was discovered for"""
+        stored = {"signature": self._level_signature(), "saved_at": time.time(), "mapping": mapping}
+        try:
+            self._floor_mapping_file.write_text(
+                json_dumps(stored, indent=True),
+                encoding='utf-8'
+            )
+        except OSError as e:
+            logger.warning(f"Could not save floor mapping {self._floor_mapping_file}: {e}")
+
+    def _apply_stored_floor_mapping(self):
+        """Use the previous run's floor mapping if this run extracted the same mall levels"""
+        if self._stored_floor_mapping is None or self.config.floor_mapping:
+            return
+        signature, mapping = self._stored_floor_mapping
+        if mapping and signature == self._level_signature():
+            self.config.floor_mapping = dict(mapping)
+            logger.info(f"📂 Reusing floor mapping for {len(mapping)} levels from {self._floor_mapping_file.name}")
+
     def _save_results(self, evaluation: EvaluationReport, iterations: int):
         """Save all results with mall-specific filenames"""
-        # Save normalized data as JSON
         json_file = self.output_dir / f"{self.mall_name}_normalized_data.json"
-        export_to_json(self.normalized_records, json_file)
-
-        # Save as CSV
         csv_file = self.output_dir / f"{self.mall_name}_normalized_data.csv"
-        export_to_csv(self.normalized_records, csv_file)
-
-        # Save evaluation report
         report_file = self.output_dir / f"{self.mall_name}_quality_report.json"
-        create_summary_report(
-            evaluation,
-            report_file,
-            metadata={
-                "mall_name": self.mall_name,
-                "root_url": self.root_url,
-                "iterations": iterations,
-                "api_calls": self.ai_client.api_call_count if self.ai_client else 0,
-                "timestamp": datetime.now().isoformat()
-            }
-        )
-
-        # Save config
         config_file = self.output_dir / f"{self.mall_name}_site_config.json"
-        self.config.save(config_file)
+        metadata = {
+            "mall_name": self.mall_name,
+            "root_url": self.root_url,
+            "iterations": iterations,
+            "api_calls": self.ai_client.api_call_count - self._api_calls_start if self.ai_client else 0,
+            "timestamp": datetime.now().isoformat()
+        }
+
+        # Each output goes to its own file, so the writes overlap (file I/O releases the GIL)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [
+                executor.submit(export_to_json, self.normalized_records, json_file),  # Normalized data as JSON
+                executor.submit(export_to_csv, self.normalized_records, csv_file),  # ... and as CSV
+                executor.submit(create_summary_report, evaluation, report_file, metadata=metadata),
+                executor.submit(self.config.save, config_file)
+            ]
+            for future in futures:
+                future.result()  # Re-raise any write error
 
         logger.info(f"\n✅ Results saved to {self.output_dir.absolute()}")
         logger.info(f"   - {json_file.name}")
@@ -1,13 +1,15 @@
 """Data models for autonomous scraping system"""
 
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
 from typing import Dict, List, Any, Optional, Tuple
 import re
-import json
+import copy
 from pathlib import Path
 
+from utils.serialization import json_dumps, json_loads
 
-@dataclass
+
+@dataclass(slots=True)
 class RawRecord:
     """Raw scraped data with provenance"""
     source_url: str
@@ -17,7 +19,7 @@ class RawRecord:
     extraction_method: str  # "api", "html", "playwright"
 
 
-@dataclass
+@dataclass(slots=True)
 class NormalizedRecord:
     """Normalized data in canonical schema"""
     # Core fields
@@ -41,10 +43,14 @@ class NormalizedRecord:
     extraction_method: Optional[str] = None
 
     def to_dict(self) -> Dict:
-        return {k: v for k, v in asdict(self).items() if v is not None}
+        # All fields are flat strings, so no asdict() deep copy is needed
+        return {f: v for f in _NORMALIZED_FIELDS if (v := getattr(self, f)) is not None}
+
+
+_NORMALIZED_FIELDS = tuple(f.name for f in fields(NormalizedRecord))
 
 
-@dataclass
+@dataclass(slots=True)
 class EvaluationReport:
     """Data quality evaluation"""
     total_records: int
@@ -66,10 +72,14 @@ class EvaluationReport:
         return self.overall_coverage >= threshold
 
     def to_dict(self) -> Dict:
-        return asdict(self)
+        # Shallow: the containers are shared with the report (callers serialize right away)
+        return {f: getattr(self, f) for f in _EVALUATION_FIELDS}
+
+
+_EVALUATION_FIELDS = tuple(f.name for f in fields(EvaluationReport))
 
 
-@dataclass
+@dataclass(slots=True)
 class SiteConfig:
     """Site-specific configuration (gets patched during repair loop)"""
     sections: Dict[str, str] = field(default_factory=dict)  # section_name → URL
@@ -78,6 +88,11 @@ class SiteConfig:
     selectors: Dict[str, Dict[str, str]] = field(default_factory=dict)  # section → CSS selectors
     api_endpoints: Dict[str, str] = field(default_factory=dict)  # section → API endpoint
 
+    # Run state found by the agents (slotted, so these must be declared)
+    ai_analysis: Dict[str, Any] = field(default_factory=dict)  # Recon agent's site analysis
+    extraction_config: Dict[str, Any] = field(default_factory=dict)  # AI-generated extraction config
+    floor_mapping: Dict[int, str] = field(default_factory=dict)  # malllevel_id → canonical floor
+
     def save(self, filepath: Path):
         """Save config to JSON"""
         config_dict = {
@@ -88,30 +103,43 @@ class SiteConfig:
             'api_endpoints': self.api_endpoints
         }
         with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(config_dict, f, indent=2, ensure_ascii=False)
+            f.write(json_dumps(config_dict, indent=True))
 
     @classmethod
     def load(cls, filepath: Path) -> 'SiteConfig':
-        """Load config from JSON"""
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        # Convert floor patterns back to regex
-        floor_patterns = [
-            (re.compile(pattern), replacement)
-            for pattern, replacement in data.get('floor_patterns', [])
-        ]
-
+        """Load config from JSON (parsed files are cached until they change on disk)"""
+        path = Path(filepath).resolve()
+        stat = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        cached = _CONFIG_CACHE.get(path)
+        if cached is None or cached[0] != stamp:
+            with open(path, 'rb') as f:
+                data = json_loads(f.read())
+
+            # Convert floor patterns back to regex (compiled once per file version)
+            floor_patterns = [
+                (re.compile(pattern), replacement)
+                for pattern, replacement in data.get('floor_patterns', [])
+            ]
+            cached = _CONFIG_CACHE[path] = (stamp, data, floor_patterns)
+
+        _, data, floor_patterns = cached
+        # Fresh containers per load - configs get patched during the repair loop
         return cls(
-            sections=data.get('sections', {}),
-            extraction_rules=data.get('extraction_rules', {}),
-            floor_patterns=floor_patterns,
-            selectors=data.get('selectors', {}),
-            api_endpoints=data.get('api_endpoints', {})
+            sections=copy.deepcopy(data.get('sections', {})),
+            extraction_rules=copy.deepcopy(data.get('extraction_rules', {})),
+            floor_patterns=list(floor_patterns),
+            selectors=copy.deepcopy(data.get('selectors', {})),
+            api_endpoints=copy.deepcopy(data.get('api_endpoints', {}))
         )
 
 
-@dataclass
+# Resolved path → ((mtime_ns, size), parsed JSON, compiled floor patterns) for SiteConfig.load
+_CONFIG_CACHE: Dict[Path, Tuple[Tuple[int, int], Dict[str, Any], List[Tuple[re.Pattern, str]]]] = {}
+
+
+@dataclass(slots=True)
 class PageClassification:
     """Classification of a web page"""
     url: str
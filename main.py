@@ -17,7 +17,6 @@ import sys
 import logging
 import argparse
 from pathlib import Path
-from dotenv import load_dotenv
 import os
 import codecs
 
@@ -29,8 +28,6 @@ if sys.platform == 'win32':
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from core import AutonomousMallScraper
-
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -60,8 +57,12 @@ def main():
 
     args = parser.parse_args()
 
-    # Load environment variables from .env
+    # Heavy imports (scraper, bs4/lxml, OpenAI SDK) are deferred so --help / argument errors return at once
+    from dotenv import load_dotenv
+
+    # Load environment variables from .env (before importing core - cache paths are read at import)
     load_dotenv()
+    from core import AutonomousMallScraper
 
     # Verify .env is configured
     if not os.getenv("AZURE_OPENAI_ENDPOINT"):
@@ -2,10 +2,13 @@
 
 from .normalization import normalize_floor, extract_shop_number
 from .export import export_to_csv, export_to_json
+from .serialization import json_dumps, json_loads
 
 __all__ = [
     'normalize_floor',
     'extract_shop_number',
     'export_to_csv',
-    'export_to_json'
+    'export_to_json',
+    'json_dumps',
+    'json_loads'
 ]
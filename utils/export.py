@@ -2,12 +2,46 @@
 
 import csv
 import json
+from operator import attrgetter
+from dataclasses import asdict, fields, is_dataclass
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Set
 import logging
 
+from .serialization import json_dumps
+
 logger = logging.getLogger(__name__)
 
+# Output directories already created by this process (one save cycle writes several files to the same one)
+_ENSURED_DIRS: Set[Path] = set()
+
+
+def _ensure_dir(directory: Path):
+    """Create directory (and parents) once per process"""
+    if directory not in _ENSURED_DIRS:
+        directory.mkdir(parents=True, exist_ok=True)
+        _ENSURED_DIRS.add(directory)
+
+
+def _encode_json(data: Any, indent: int) -> str:
+    """JSON-encode data; the default 2-space indent goes through json_dumps (orjson when installed)"""
+    if indent == 2:
+        return json_dumps(data, indent=True)
+    return json.dumps(data, indent=indent, ensure_ascii=False)
+
+
+def _record_to_dict(record: Any) -> Any:
+    """Convert a record (dict or dataclass instance) to a plain dict for export"""
+    if hasattr(record, 'to_dict'):
+        return record.to_dict()
+    if isinstance(record, dict):
+        return record
+    if is_dataclass(record):
+        return asdict(record)  # Slotted dataclasses have no __dict__
+    if hasattr(record, '__dict__'):
+        return record.__dict__
+    return record
+
 
 def export_to_csv(records: List[Any], output_path: Path, fieldnames: List[str] = None):
     """
@@ -22,28 +56,50 @@ def export_to_csv(records: List[Any], output_path: Path, fieldnames: List[str] =
         logger.warning("No records to export")
         return
 
-    # Convert dataclass instances to dicts
-    dict_records = []
-    for record in records:
-        if hasattr(record, 'to_dict'):
-            dict_records.append(record.to_dict())
-        elif isinstance(record, dict):
-            dict_records.append(record)
+    # Auto-detect fieldnames if not provided (dataclass fields, so no record needs converting up front)
+    if not fieldnames:
+        first = records[0]
+        if is_dataclass(first) and not isinstance(first, type):
+            fieldnames = [f.name for f in fields(first)]
         else:
-            dict_records.append(record.__dict__)
-
-    # Auto-detect fieldnames if not provided
-    if not fieldnames and dict_records:
-        fieldnames = list(dict_records[0].keys())
+            fieldnames = list(_record_to_dict(first).keys())
 
-    # Write CSV
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    # Write CSV, building one row tuple at a time instead of materializing every dict
+    _ensure_dir(output_path.parent)
+    count = 0
     with open(output_path, 'w', encoding='utf-8-sig', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-        writer.writeheader()
-        writer.writerows(dict_records)
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        row = _csv_row_builder(fieldnames)
+        for record in records:
+            writer.writerow(row(record))
+            count += 1
 
-    logger.info(f"Exported {len(dict_records)} records to {output_path}")
+    logger.info(f"Exported {count} records to {output_path}")
+
+
+def _csv_row_builder(fieldnames: List[str]):
+    """
+    Return a function mapping a record to its CSV row in fieldnames order
+
+    Dataclass fields are read straight off the instance (None is written as an
+    empty cell, the same as a key to_dict() drops); other records go through
+    _record_to_dict with missing keys left empty, like csv.DictWriter.
+    """
+    getter = attrgetter(*fieldnames)
+    single = len(fieldnames) == 1
+
+    def row(record: Any):
+        if is_dataclass(record):
+            try:
+                values = getter(record)
+                return (values,) if single else values
+            except AttributeError:  # Requested column that is not a field
+                pass
+        data = _record_to_dict(record)
+        return [data.get(name, '') for name in fieldnames]
+
+    return row
 
 
 def export_to_json(data: Any, output_path: Path, indent: int = 2):
@@ -55,29 +111,47 @@ def export_to_json(data: Any, output_path: Path, indent: int = 2):
         output_path: Output JSON file path
         indent: JSON indentation (default: 2)
     """
+    _ensure_dir(output_path.parent)
+
+    # Lists are streamed item by item (same output as json.dump of the converted list)
+    if isinstance(data, list) and not hasattr(data, 'to_dict'):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            _write_json_array(f, data, indent)
+        logger.info(f"Exported data to {output_path}")
+        return
+
     # Convert dataclass instances
-    if hasattr(data, 'to_dict'):
-        json_data = data.to_dict()
-    elif isinstance(data, list):
-        json_data = []
-        for item in data:
-            if hasattr(item, 'to_dict'):
-                json_data.append(item.to_dict())
-            elif hasattr(item, '__dict__'):
-                json_data.append(item.__dict__)
-            else:
-                json_data.append(item)
-    else:
-        json_data = data
+    json_data = data.to_dict() if hasattr(data, 'to_dict') else data
 
     # Write JSON
-    output_path.parent.mkdir(parents=True, exist_ok=True)
     with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(json_data, f, indent=indent, ensure_ascii=False)
+        f.write(_encode_json(json_data, indent))
 
     logger.info(f"Exported data to {output_path}")
 
 
+def _write_json_array(f, items: List[Any], indent: int):
+    """Write items as a JSON array, converting and encoding one element at a time"""
+    if not items:
+        f.write('[]')
+        return
+
+    # Nested lines get one more indentation level; JSON strings never contain raw newlines
+    pretty = indent is not None
+    pad = '\n' + ' ' * indent if pretty else ''
+    # Records are usually all one type: resolve its to_dict once instead of probing every item
+    kind = type(items[0])
+    convert = kind.to_dict if hasattr(kind, 'to_dict') else _record_to_dict
+
+    f.write('[' + pad)
+    for i, item in enumerate(items):
+        if i:
+            f.write(',' + pad if pretty else ', ')
+        encoded = _encode_json(convert(item) if type(item) is kind else _record_to_dict(item), indent)
+        f.write(encoded.replace('\n', pad) if pretty else encoded)
+    f.write(('\n' if pretty else '') + ']')
+
+
 def create_summary_report(
     evaluation: Any,
     output_path: Path,
@@ -1,6 +1,7 @@
 """Data normalization utilities"""
 
 import re
+from functools import lru_cache
 from typing import Optional, Tuple
 
 
@@ -86,7 +87,28 @@ FLOOR_PATTERNS_SEARCH = [
 # Legacy name for backwards compatibility
 FLOOR_PATTERNS = FLOOR_PATTERNS_EXACT
 
+# Location strings repeat heavily within a mall, so the parsers below are memoized
+_PARSE_CACHE_SIZE = 4096
 
+# Shop number patterns (used by extract_shop_number)
+_CHINESE_SHOP_RE = re.compile(r'([0-9A-Z\-/]+)\s*[舖铺號号店]', re.I)  # "301舖", "12號"
+_SEGMENT_SHOP_RE = re.compile(r'([0-9A-Z\-/]+)\s*[舖铺號号店]')  # Same, case-sensitive (per segment)
+_SEGMENT_SPLIT_RE = re.compile(r'[,，]')
+_PURE_SEGMENT_RE = re.compile(r'^[0-9A-Z\-/]+$')
+_SHOP_EN_RE = re.compile(r'Shop\s+([A-Z0-9\-/]+)', re.I)
+_UNIT_EN_RE = re.compile(r'Unit\s+([A-Z0-9\-/]+)', re.I)
+_START_NUMBER_RE = re.compile(r'^([0-9][0-9A-Z\-/]*)')
+
+_CANONICAL_FLOOR_RE = re.compile(r'^(G|B[0-9]+|L[0-9]+)$')
+
+# Floors already in canonical form (normalize_floor returns these unchanged without running the patterns)
+_CANONICAL_FLOORS = frozenset(
+    {"G", "LB", "UB", "LG", "UG", "UC", "LC", "C", "M"}
+    | {f"{prefix}{level}" for prefix in ("L", "B", "P", "M") for level in range(1, 100)}
+)
+
+
+@lru_cache(maxsize=_PARSE_CACHE_SIZE)
 def normalize_floor(raw_floor: str) -> Optional[str]:
     """
     Normalize floor to canonical format
@@ -107,6 +129,10 @@ def normalize_floor(raw_floor: str) -> Optional[str]:
 
     raw_floor = str(raw_floor).strip()
 
+    # Fast path: already canonical
+    if raw_floor in _CANONICAL_FLOORS:
+        return raw_floor
+
     # Try each pattern
     for pattern, replacer in FLOOR_PATTERNS:
         match = pattern.search(raw_floor)
@@ -118,12 +144,13 @@ def normalize_floor(raw_floor: str) -> Optional[str]:
                 continue
 
     # If no pattern matched, check if it's already in canonical format
-    if re.match(r'^(G|B[0-9]+|L[0-9]+)$', raw_floor):
+    if _CANONICAL_FLOOR_RE.match(raw_floor):
         return raw_floor
 
     return None
 
 
+@lru_cache(maxsize=_PARSE_CACHE_SIZE)
 def extract_shop_number(location: str, unit_field: Optional[str] = None) -> Optional[str]:
     """
     Extract shop number from location text or unit field
@@ -146,41 +173,42 @@ def extract_shop_number(location: str, unit_field: Optional[str] = None) -> Opti
     if location:
         # Try Chinese shop patterns first (most specific)
         # Pattern: "301舖" or "301號" (shop/number suffix)
-        chinese_shop = re.search(r'([0-9A-Z\-/]+)\s*[舖铺號号店]', location, re.I)
+        chinese_shop = _CHINESE_SHOP_RE.search(location)
         if chinese_shop:
             return chinese_shop.group(1)
 
         # Try comma-separated segments (common in Chinese malls)
         # e.g., "Shop Name一期, L3, 301舖" → look in segments after commas
-        segments = re.split(r'[,，]', location)
+        segments = _SEGMENT_SPLIT_RE.split(location)
         for segment in segments:
             segment = segment.strip()
             # Look for shop number with suffix
-            shop_in_segment = re.search(r'([0-9A-Z\-/]+)\s*[舖铺號号店]', segment)
+            shop_in_segment = _SEGMENT_SHOP_RE.search(segment)
             if shop_in_segment:
                 return shop_in_segment.group(1)
             # Look for pure number segment (after floor info)
-            if re.match(r'^[0-9A-Z\-/]+$', segment) and len(segment) <= 10:
+            if _PURE_SEGMENT_RE.match(segment) and len(segment) <= 10:
                 return segment
 
         # Try "Shop XXX" pattern (English)
-        shop_match = re.search(r'Shop\s+([A-Z0-9\-/]+)', location, re.I)
+        shop_match = _SHOP_EN_RE.search(location)
         if shop_match:
             return shop_match.group(1)
 
         # Try "Unit XXX" pattern (English)
-        unit_match = re.search(r'Unit\s+([A-Z0-9\-/]+)', location, re.I)
+        unit_match = _UNIT_EN_RE.search(location)
         if unit_match:
             return unit_match.group(1)
 
         # Last resort: number at start (only if it's pure numeric/alphanumeric, not letters)
-        start_match = re.match(r'^([0-9][0-9A-Z\-/]*)', location)
+        start_match = _START_NUMBER_RE.match(location)
         if start_match:
             return start_match.group(1)
 
     return None
 
 
+@lru_cache(maxsize=_PARSE_CACHE_SIZE)
 def extract_floor_and_shop_from_location(location: str) -> Tuple[Optional[str], Optional[str]]:
     """
     Extract both floor and shop number from location text
@@ -226,10 +254,8 @@ def clean_text(text: Optional[str]) -> Optional[str]:
     if not text:
         return None
 
-    # Strip whitespace
-    text = text.strip()
-
-    # Remove multiple spaces
-    text = re.sub(r'\s+', ' ', text)
+    # Strip whitespace and collapse runs to single spaces in one C-level pass
+    # (str.split() splits on exactly the characters \s matches)
+    text = ' '.join(text.split())
 
     return text if text else None
@@ -0,0 +1,45 @@
+"""JSON serialization helpers (orjson when installed, stdlib otherwise)"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json is used as a fallback
+    orjson = None
+
+
+def json_dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    """
+    Serialize to a JSON string (non-ASCII characters are kept as-is)
+
+    Args:
+        obj: Object to serialize
+        indent: Pretty-print with 2-space indentation
+        sort_keys: Sort object keys (for stable hashing)
+
+    Returns:
+        JSON string
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, option=option).decode('utf-8')
+        except TypeError:  # Types orjson rejects (e.g. sets, >64-bit ints)
+            pass
+
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False, sort_keys=sort_keys)
+    # Compact separators match orjson output, so hashes agree with or without it
+    return json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, separators=(',', ':'))
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """Parse a JSON string or bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)